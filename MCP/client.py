@@ -1,7 +1,9 @@
 # /// script
 # requires-python = ">=3.12"
 # dependencies = [
-#     "mcp==1.6.0"
+#     "mcp==1.6.0",
+#     "orjson",
+#     "uvloop; sys_platform != 'win32'"
 # ]
 # ///
 
@@ -70,11 +72,89 @@
 from mcp import ClientSession, types, shared
 from mcp.client.sse import sse_client
 from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
-from typing import Literal
+from typing import Awaitable, Iterable, Literal, TypeVar
 from pydantic import ValidationError
-import json
+from contextlib import AsyncExitStack
+from datetime import timedelta
+import asyncio
+import orjson
+import logging
+import os
+import re
+import time
+
+try:
+    import uvloop
+except ImportError:  # uvloop is unavailable on Windows
+    uvloop = None
 
 MCP_SERVER_URL = "http://localhost:8080/sse"
+# Requests kept outstanding at once when pipelining, so the server always has
+# work queued without being flooded by a large batch.
+MAX_IN_FLIGHT = 20
+# Upper bound on any single request; a stuck call fails instead of hanging the run.
+REQUEST_TIMEOUT = timedelta(seconds=30)
+# Characters of resource text shown when printing a read.
+PREVIEW_CHARS = 100
+# Seconds a callback may block the event loop before MCP_DEBUG reports it.
+SLOW_CALLBACK_DURATION = 0.05
+# Seconds a bootstrap() listing stays fresh before the server is asked again.
+DISCOVERY_TTL = 30.0
+# Server notifications that make the cached bootstrap() listing stale.
+LIST_CHANGED_NOTIFICATIONS = (
+    types.PromptListChangedNotification,
+    types.ToolListChangedNotification,
+    types.ResourceListChangedNotification,
+)
+
+logging.basicConfig(level=os.getenv("MCP_LOG", "WARNING"))
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Server log levels mapped onto the stdlib ones, so each notification costs
+# one lookup and is dropped before formatting when its level is filtered out.
+LOG_LEVELS: dict[types.LoggingLevel, int] = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "notice": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+    "alert": logging.CRITICAL,
+    "emergency": logging.CRITICAL,
+}
+
+# Sample values for prompt arguments: the first rule whose pattern matches an
+# argument name wins, and anything unmatched gets SAMPLE_ARGUMENT_FALLBACK.
+SAMPLE_ARGUMENT_RULES: list[tuple[re.Pattern[str], str]] = [
+    (re.compile(r"path|file|dir", re.IGNORECASE), "/some/file.txt"),
+    (re.compile(r"total|count|chunks|size", re.IGNORECASE), "5"),
+    (re.compile(r"text|query|prompt", re.IGNORECASE), "hello"),
+]
+SAMPLE_ARGUMENT_FALLBACK = "example"
+
+
+def sample_arguments(prompt: types.Prompt) -> dict[str, str]:
+    """Fill every declared argument of ``prompt`` with a sample value."""
+    return {
+        arg.name: next(
+            (
+                value
+                for pattern, value in SAMPLE_ARGUMENT_RULES
+                if pattern.search(arg.name)
+            ),
+            SAMPLE_ARGUMENT_FALLBACK,
+        )
+        for arg in prompt.arguments or ()
+    }
+
+
+def preview(text: str) -> str:
+    """Shorten ``text`` to PREVIEW_CHARS by slicing, without copying the rest."""
+    if len(text) <= PREVIEW_CHARS:
+        return text
+    return f"{text[:PREVIEW_CHARS]}… ({len(text)} chars)"
 
 
 async def list_roots_callback(
@@ -118,21 +198,30 @@ async def handle_root_message(
 async def handle_sampling_message(
     context: shared.context.RequestContext, arguments: types.CreateMessageRequestParams
 ) -> types.CreateMessageResult:
-    print("📩 [Sampling Message] Received:", arguments)
+    logger.debug("📩 [Sampling Message] Received: %s", arguments)
+
+    # Only metadata carrying a uri can describe a root, so plain text messages
+    # skip Root validation and its exception entirely.
+    metadata = arguments.metadata
+    if metadata and "uri" in metadata:
+        try:
+            root = types.Root(**metadata)
+        except (ValidationError, TypeError):
+            pass
+        else:
+            return await handle_root_message(context, root)
 
-    try:
-        root = types.Root(**arguments.metadata)
-        return await handle_root_message(context, root)
-    except (ValidationError, TypeError):
-        return await handle_text_message(context, arguments)
+    return await handle_text_message(context, arguments)
 
 
-async def logging_callback(level: str, message: str):
-    print(f"[{level.upper()}] {message}")
+async def logging_callback(params: types.LoggingMessageNotificationParams):
+    level = LOG_LEVELS[params.level]
+    if logger.isEnabledFor(level):
+        logger.log(level, "[%s] %s", params.level.upper(), params.data)
 
 
 async def message_handler(message: types.JSONRPCMessage):
-    print(f"Received message: {message}")
+    logger.debug("Received message: %r", message)
 
 
 async def initialize(session: ClientSession):
@@ -171,149 +260,314 @@ async def initialize(session: ClientSession):
     )
 
 
-async def run():
-    async with sse_client(MCP_SERVER_URL) as (read, write):
-        async with ClientSession(
-            read,
-            write,
-            sampling_callback=handle_sampling_message,
-            list_roots_callback=list_roots_callback,
-            logging_callback=logging_callback,
-            message_handler=message_handler,
-        ) as session:
-            await session.initialize()
-
-            print("📡 Sending ping...")
-            await session.send_ping()
-            print("✅ Ping acknowledged.\n")
-
-            print("⚙️ Setting logging level to INFO...")
-            # await session.set_logging_level("info")
-
-            # PROMPTS
-            print("\n🔍 [Prompts] Listing available prompts...")
-            prompts_result = await session.list_prompts()
-            for p in prompts_result.prompts:
-                print(f"  • {p.name} ({len(p.arguments)} arg(s))")
-
-            if prompts_result.prompts:
-                selected_prompt = prompts_result.prompts[0]
-                print(f"\n💬 [Prompt] Executing '{selected_prompt.name}'...")
-                prompt_result = await session.get_prompt(
-                    selected_prompt.name,
-                    arguments={"file_path": "/some/file.txt", "total_chunks": "5"},
-                )
-                for msg in prompt_result.messages:
-                    print(f"   🧾 {msg.role.capitalize()} says: {msg.content.text}")
-
-            # TOOLS
-            print("\n🔧 [Tools] Listing available tools...")
-            tools_result = await session.list_tools()
-            tools = tools_result.tools
-            for tool in tools:
-                print(f"  • {tool.name}: {tool.description}")
-
-            print("\n📁 [Tool] Calling 'list_directory' on current directory...")
-            if any(t.name == "list_directory" for t in tools):
-                tool_result = await session.call_tool(
-                    "list_directory", {"directory_path": "."}
+class MCPClient:
+    """One SSE connection and initialized session, reused for every operation."""
+
+    def __init__(self, server_url: str = MCP_SERVER_URL):
+        self.server_url = server_url
+        self.session: ClientSession | None = None
+        # Filled once from the initialize result instead of re-read from it
+        self.server_info: types.Implementation | None = None
+        self.protocol_version: str | None = None
+        self.prompts: list[types.Prompt] = []
+        self.tools: list[types.Tool] = []
+        self.tool_names: frozenset[str] = frozenset()
+        self.templates: list[types.ResourceTemplate] = []
+        self.resources: list[types.Resource] = []
+        self._discovered_at: float | None = None
+        # Bumped on every list_changed notification, so a discovery that was
+        # already in flight knows its results may be stale.
+        self._generation = 0
+        self._log_messages = False
+        self._discovery: asyncio.Task[None] | None = None
+        self._stack = AsyncExitStack()
+        self._in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+    async def __aenter__(self) -> "MCPClient":
+        # Only log every incoming frame when DEBUG is on at connect time;
+        # list_changed notifications are handled regardless.
+        self._log_messages = logger.isEnabledFor(logging.DEBUG)
+        try:
+            read, write = await self._stack.enter_async_context(
+                sse_client(self.server_url)
+            )
+            self.session = await self._stack.enter_async_context(
+                ClientSession(
+                    read,
+                    write,
+                    read_timeout_seconds=REQUEST_TIMEOUT,
+                    sampling_callback=handle_sampling_message,
+                    list_roots_callback=list_roots_callback,
+                    logging_callback=logging_callback,
+                    message_handler=self._on_message,
                 )
-                print("   📂 Contents:")
-                for item in tool_result.content:
-                    print(f"     - {item.text}")
-            else:
-                print("⚠️  'list_directory' tool not available.")
+            )
+            result = await self.session.initialize()
+        except BaseException:
+            # __aexit__ never runs when __aenter__ fails
+            await self._stack.aclose()
+            self.session = None
+            raise
+        self.server_info = result.serverInfo
+        self.protocol_version = result.protocolVersion
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._discovery is not None:
+            self._discovery.cancel()
+            self._discovery = None
+        await self._stack.aclose()
+        self.session = None
+        self.server_info = None
+        self.protocol_version = None
+        self._discovered_at = None
+
+    async def _on_message(self, message) -> None:
+        if self._log_messages:
+            await message_handler(message)
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, LIST_CHANGED_NOTIFICATIONS
+        ):
+            # Invalidate instead of waiting out the TTL; the next bootstrap()
+            # fetches the listing again.
+            self._generation += 1
+            self._discovered_at = None
+
+    async def bootstrap(self) -> None:
+        """Ping the server and cache its prompts, tools and resources.
+
+        The cached listing is reused for DISCOVERY_TTL seconds, or until the
+        server announces a list change, so repeated runs on one connection
+        skip the discovery round-trip.
+        """
+        if (
+            self._discovered_at is not None
+            and time.monotonic() - self._discovered_at < DISCOVERY_TTL
+        ):
+            return
+
+        # Single flight: concurrent callers await the discovery already in
+        # progress instead of each fanning out its own set of list requests.
+        if self._discovery is None:
+            self._discovery = asyncio.create_task(self._discover())
+        discovery = self._discovery
+        try:
+            await asyncio.shield(discovery)
+        finally:
+            if discovery.done() and self._discovery is discovery:
+                self._discovery = None
+
+    async def _discover(self) -> None:
+        # The discovery requests are independent, so issue them together
+        # and pay a single round-trip instead of one per request. This is as
+        # close to a JSON-RPC batch as mcp 1.6 allows: its JSONRPCMessage
+        # model has no array form, so the server rejects batched frames.
+        generation = self._generation
+        print("📡 Sending ping and discovering server features...")
+        _, prompts_result, tools_result, templates_result, resources_result = (
+            await asyncio.gather(
+                self.session.send_ping(),
+                self.session.list_prompts(),
+                self.session.list_tools(),
+                self.session.list_resource_templates(),
+                self.session.list_resources(),
+            )
+        )
+        print(
+            f"✅ Ping acknowledged by {self.server_info.name} {self.server_info.version}"
+            f" (protocol {self.protocol_version}).\n"
+        )
 
-            print(
-                "\n📁 [Tool] Calling 'check_experimental_tools_capability' for Sampling..."
+        self.prompts = prompts_result.prompts
+        self.tools = tools_result.tools
+        # Built once per bootstrap; every tool check is a membership test on it.
+        self.tool_names = frozenset(t.name for t in self.tools)
+        self.templates = templates_result.resourceTemplates
+        self.resources = resources_result.resources
+        # A change announced mid-fetch leaves these lists uncached
+        if self._generation == generation:
+            self._discovered_at = time.monotonic()
+
+    async def demo_prompts(self) -> None:
+        print("\n🔍 [Prompts] Listing available prompts...")
+        for p in self.prompts:
+            print(f"  • {p.name} ({len(p.arguments)} arg(s))")
+
+        if self.prompts:
+            selected_prompt = self.prompts[0]
+            print(f"\n💬 [Prompt] Executing '{selected_prompt.name}'...")
+            prompt_result = await self.session.get_prompt(
+                selected_prompt.name,
+                arguments=sample_arguments(selected_prompt),
             )
-            if any(t.name == "check_experimental_tools_capability" for t in tools):
-                tool_result = await session.call_tool(
-                    "check_experimental_tools_capability", {}
-                )
-                print(tool_result)
-                print("   📂 Contents:")
-                for item in tool_result.content:
-                    print(f"     - {item.text}")
-            else:
-                print("⚠️  'check_experimental_tools_capability' tool not available.")
+            for msg in prompt_result.messages:
+                print(f"   🧾 {msg.role.capitalize()} says: {msg.content.text}")
+
+    async def call_list_directory(self, directory_path: str) -> None:
+        print("\n🔧 [Tools] Listing available tools...")
+        for tool in self.tools:
+            print(f"  • {tool.name}: {tool.description}")
+
+        print(f"\n📁 [Tool] Calling 'list_directory' on '{directory_path}'...")
+        if "list_directory" in self.tool_names:
+            tool_result = await self.session.call_tool(
+                "list_directory", {"directory_path": directory_path}
+            )
+            print("   📂 Contents:")
+            # Tools may mix in image or resource items; only text is listed.
+            texts = [item.text for item in tool_result.content if item.type == "text"]
+            for text in texts:
+                print(f"     - {text}")
+        else:
+            print("⚠️  'list_directory' tool not available.")
+
+    async def check_capabilities(self) -> None:
+        print("\n📁 [Tool] Calling 'check_capabilities'...")
+        if "check_capabilities" not in self.tool_names:
+            print("⚠️  'check_capabilities' tool not available.")
+            return
+
+        # One round-trip answers every probe instead of a call per capability.
+        tool_result = await self.session.call_tool(
+            "check_capabilities",
+            {"names": ["experimental_tools", "sampling", "roots"]},
+        )
+        print("   📂 Contents:")
+        for name, supported in orjson.loads(tool_result.content[0].text).items():
+            print(f"     - {name}: {'Supported' if supported else 'Not supported'}")
+
+    async def demo_chunked_read(self, file_path: str) -> None:
+        print("\n🗂️ [Resources] Listing referenced resources...")
+        if not self.templates:
+            print("   ⚠️ No resources registered in the session.")
+        else:
+            for res in self.templates:
+                print(f"   • {res.uriTemplate}")
+
+        # Metadata, the first chunk and the sample resource do not depend on
+        # each other, so they are fetched together in one round-trip.
+        meta_uri = f"fs://chunks/{file_path}"
+        chunk_uri = f"fs://chunk/{file_path}/0"
+        print(f"\n📖 [Resource] Reading {meta_uri}, {chunk_uri} and fs://sample...")
+        meta, first, sample = await self.read_resources(
+            [meta_uri, chunk_uri, "fs://sample"]
+        )
 
-            print("\n📁 [Tool] Calling 'check_sampling_capability' for Sampling...")
-            if any(t.name == "check_sampling_capability" for t in tools):
-                tool_result = await session.call_tool(
-                    "check_sampling_capability", {"prompt": "Hi Model!"}
-                )
-                print(tool_result)
-                print("   📂 Contents:")
-                for item in tool_result.content:
-                    print(f"     - {item.text}")
+        if "error" in meta:
+            print("   ❌ Metadata:", meta["error"])
+        else:
+            print("   📄 Metadata:", preview(meta["text"]))
+            chunk_info = orjson.loads(meta["text"])
+            if "error" in chunk_info:
+                print("   ⚠️ Server could not chunk the file:", chunk_info["error"])
+            elif not chunk_info["total_chunks"]:
+                print("   ⚠️ The file is empty; there are no chunks to read.")
             else:
-                print("⚠️  'check_sampling_capability' tool not available.")
-
-            # RESOURCE LISTING
-            print("\n🗂️ [Resources] Listing referenced resources...")
-            resources = await session.list_resource_templates()
-            if not resources.resourceTemplates:
-                print("   ⚠️ No resources registered in the session.")
+                print(f"   🔗 {chunk_info['total_chunks']} chunk(s)")
+                self._print_entry("Chunk 0", first)
+
+        self._print_entry("fs://sample", sample)
+
+    @staticmethod
+    def _print_entry(label: str, entry: dict) -> None:
+        if "error" in entry:
+            print(f"   ❌ {label}:", entry["error"])
+        elif "text" in entry:
+            print(f"   📄 {label}:", preview(entry["text"]))
+        else:
+            print(f"   📄 {label}: binary content")
+
+    async def read_resources(self, uris: list[str]) -> list[dict]:
+        """Read several resources, in a single round-trip when the server allows it."""
+        if "read_resources" in self.tool_names:
+            tool_result = await self.session.call_tool("read_resources", {"uris": uris})
+            return orjson.loads(tool_result.content[0].text)
+
+        # Same shape as the tool's reply: failures are reported per URI.
+        results = await self.pipeline(
+            (self.session.read_resource(uri) for uri in uris), return_exceptions=True
+        )
+        entries = []
+        for uri, result in zip(uris, results):
+            entry = {"uri": uri}
+            if isinstance(result, Exception):
+                entry["error"] = str(result)
             else:
-                for res in resources.resourceTemplates:
-                    print(f"   • {res.uriTemplate}")
+                for item in result.contents:
+                    if isinstance(item, types.BlobResourceContents):
+                        entry["blob"] = item.blob
+                    else:
+                        entry["text"] = item.text
+            entries.append(entry)
+        return entries
+
+    async def pipeline(
+        self, calls: Iterable[Awaitable[T]], return_exceptions: bool = False
+    ) -> list[T]:
+        """Await requests concurrently, keeping at most MAX_IN_FLIGHT outstanding.
+
+        With `return_exceptions`, a failed request yields its exception in place
+        of a result instead of failing the whole batch.
+        """
+
+        async def bounded(call: Awaitable[T]) -> T:
+            async with self._in_flight:
+                return await call
+
+        return await asyncio.gather(
+            *(bounded(call) for call in calls), return_exceptions=return_exceptions
+        )
 
-            # RESOURCES
-            print("\n📖 [Resource] Reading metadata: fs://chunks/client.py")
-            chunk_meta, meta_output = await session.read_resource(
-                "fs://chunks/client.py"
-            )
-            print("   📦 Metadata:", chunk_meta)
-            print("   📄 Contents:", meta_output)
+    async def send_progress(self) -> None:
+        print("\n⏳ Sending fake progress notification...")
+        await self.session.send_progress_notification(
+            progress_token="loading", progress=0.7, total=1.0
+        )
+        print("✅ Progress update sent.\n")
 
-            print("\n📖 [Resource] Reading chunk 0: fs://chunk/client.py/0")
-            chunk_data, chunk_output = await session.read_resource(
-                "fs://chunk/client.py/0"
-            )
-            print("   📦 Metadata:", chunk_data)
-            print("   📄 Contents:", chunk_output)
+    async def demo_sample_resource(self) -> None:
+        print("\n🗂️ Listing referenced resources...")
+        for res in self.resources:
+            print(f"   • {res.uri}")
 
-            # Progress update example
-            print("\n⏳ Sending fake progress notification...")
-            await session.send_progress_notification(
-                progress_token="loading", progress=0.7, total=1.0
-            )
-            print("✅ Progress update sent.\n")
-
-            # List resources used
-            print("\n🗂️ Listing referenced resources...")
-            resource_list = await session.list_resources()
-            print(resource_list)
-            for res in resource_list.resources:
-                print(f"   • {res.uri}")
-
-            print("\n📖 [Resource] Reading metadata: fs://sample")
-            chunk_meta, meta_output = await session.read_resource("fs://sample")
-            print("   📦 Metadata:", chunk_meta)
-            print("   📄 Contents:", meta_output)
-
-            # subscribe and unsubscribe
-            print("\n📖 [Subscribe/Unsubscribe] Validate on fs://sample")
-            try:
-                await session.subscribe_resource("fs://sample")
-                await session.unsubscribe_resource("fs://sample")
-                print("✅ Subscribed and unsubscribed.")
-            except Exception as e:
-                print(f"⚠️ Subscription failed: {e}")
-
-            print("\n📁 [Tool] Calling 'check_roots_capability' for Sampling...")
-            if any(t.name == "check_roots_capability" for t in tools):
-                tool_result = await session.call_tool("check_roots_capability", {})
-                print(tool_result)
-                print("   📂 Contents:")
-                for item in tool_result.content:
-                    print(f"     - {item.text}")
-            else:
-                print("⚠️  'check_roots_capability' tool not available.")
+        # subscribe and unsubscribe; the contents were read in demo_chunked_read's batch
+        print("\n📖 [Subscribe/Unsubscribe] Validate on fs://sample")
+        try:
+            await self.session.subscribe_resource("fs://sample")
+            await self.session.unsubscribe_resource("fs://sample")
+        except Exception as e:
+            print(f"⚠️ Subscription failed: {e}")
+        else:
+            print("✅ Subscribed and unsubscribed.")
 
 
-if __name__ == "__main__":
-    import asyncio
+async def run(client: MCPClient | None = None):
+    """Run the demo, reusing ``client``'s connection and discovery when given."""
+    if client is None:
+        async with MCPClient(MCP_SERVER_URL) as client:
+            await run(client)
+        return
+
+    await client.bootstrap()
+
+    print("⚙️ Setting logging level to INFO...")
+    # await client.session.set_logging_level("info")
 
-    asyncio.run(run())
+    await client.demo_prompts()
+    await client.call_list_directory(".")
+    await client.check_capabilities()
+    await client.demo_chunked_read("client.py")
+    await client.send_progress()
+    await client.demo_sample_resource()
+
+
+if __name__ == "__main__":
+    # Every client operation is socket I/O, so the libuv-backed loop helps throughout
+    # MCP_DEBUG turns on asyncio debug mode, which logs any callback that
+    # holds the loop longer than SLOW_CALLBACK_DURATION.
+    with asyncio.Runner(
+        debug=bool(os.getenv("MCP_DEBUG")),
+        loop_factory=uvloop.new_event_loop if uvloop else None,
+    ) as runner:
+        runner.get_loop().slow_callback_duration = SLOW_CALLBACK_DURATION
+        runner.run(run())
@@ -2,7 +2,8 @@
 # requires-python = ">=3.12"
 # dependencies = [
 #     "mcp==1.6.0",
-#     "uvicorn==0.34.0"
+#     "orjson",
+#     "uvicorn[standard]==0.34.0"
 # ]
 # ///
 
@@ -21,103 +22,390 @@ from mcp.types import (
 )
 from starlette.routing import Route
 from pathlib import Path
-from typing import Literal
+from functools import cache, lru_cache
+from typing import Awaitable, Callable, Literal
+from mcp.types import ProgressToken
+import asyncio
+import base64
+import contextlib
+import fnmatch
+import mmap
+import orjson
+import os
+import re
 from mcp.server.session import ServerSession
-from pydantic import BaseModel
 
 mcp = FastMCP(name="ReadOnlyFileSystem")
 
-CHUNK_SIZE = 1024
+CHUNK_SIZE = 64 * 1024  # bytes per chunk
+FILE_CACHE_SIZE = 32
+CACHED_FILE_MAX_SIZE = 1024 * 1024  # larger files are read one chunk at a time
+SEARCH_CONCURRENCY = 32  # files scanned at once, also caps open FDs
+READ_CONCURRENCY = 16  # resources read_resources reads at once
+SKIP_DIRS = frozenset({".git", "node_modules", "__pycache__", ".venv"})
+PROGRESS_FLUSH_INTERVAL = 0.016  # seconds, so at most ~60 notifications/s per token
+BINARY_SNIFF_SIZE = 512  # a NUL byte in this prefix marks a file as binary
+BINARY_EXTENSIONS = frozenset(
+    {
+        ".pyc",
+        ".so",
+        ".o",
+        ".a",
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".gif",
+        ".webp",
+        ".pdf",
+        ".zip",
+        ".gz",
+        ".tar",
+        ".whl",
+        ".exe",
+        ".dll",
+        ".class",
+        ".jar",
+        ".mp3",
+        ".mp4",
+    }
+)
+
+
+def to_json(payload: dict | list) -> str:
+    """Encode a payload with orjson so FastMCP passes the string through as-is."""
+    return orjson.dumps(payload).decode()
+
 
+@lru_cache(maxsize=FILE_CACHE_SIZE)
+def _load_bytes(path_str: str, mtime_ns: int, size: int) -> bytes:
+    """Read a file once per (path, mtime, size); a modified file gets a new key."""
+    return Path(path_str).read_bytes()
 
-class RootContent(BaseModel):
-    type: str
-    uri: str
+
+def read_cached_bytes(path: Path, st: os.stat_result | None = None) -> bytes:
+    """Return the bytes of `path`, served from memory while the file is unchanged.
+
+    Files over CACHED_FILE_MAX_SIZE are read directly and never kept in the cache.
+    """
+    st = st or path.stat()
+    if st.st_size > CACHED_FILE_MAX_SIZE:
+        return path.read_bytes()
+    return _load_bytes(str(path.resolve()), st.st_mtime_ns, st.st_size)
+
+
+def read_window(path: Path, offset: int, length: int) -> bytes:
+    """Read `length` bytes at `offset` without touching the rest of the file."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, offset, length, os.POSIX_FADV_SEQUENTIAL)
+        return os.pread(fd, length, offset)
+    finally:
+        os.close(fd)
 
 
 @mcp.resource("fs://sample")
-def get_sample_resource() -> dict:
+def get_sample_resource() -> str:
     """Return a sample resource payload with structured data."""
-    return {
-        "name": "Sample Resource",
-        "description": "This is a static example resource served by FastMCP.",
-        "usage": {
-            "info": "You can customize this endpoint to return dynamic content.",
-            "example": "fs://sample",
-        },
-        "data": "Hello from the sample resource! 🎉",
-    }
+    return to_json(
+        {
+            "name": "Sample Resource",
+            "description": "This is a static example resource served by FastMCP.",
+            "usage": {
+                "info": "You can customize this endpoint to return dynamic content.",
+                "example": "fs://sample",
+            },
+            "data": "Hello from the sample resource! 🎉",
+        }
+    )
 
 
-@mcp.resource("fs://chunk/{file_path}/{chunk_index}")
-def get_file_chunk(file_path: str, chunk_index: int) -> str:
-    """Return a specific chunk from a file"""
+def _read_chunk(file_path: str, chunk_index: int, chunk_size: int) -> str:
     path = Path(file_path)
     if not path.is_file():
         return f"Error: '{file_path}' is not a valid file"
+    if chunk_size <= 0:
+        return f"Error: chunk size must be positive, got {chunk_size}"
+    if chunk_index < 0:
+        return f"Error: chunk index must not be negative, got {chunk_index}"
+    # The size comes from the client; cap it so one request cannot make
+    # pread allocate an arbitrarily large buffer.
+    chunk_size = min(chunk_size, CACHED_FILE_MAX_SIZE)
 
     try:
-        text = path.read_text()
-        start = chunk_index * CHUNK_SIZE
-        end = start + CHUNK_SIZE
-        return text[start:end] if start < len(text) else ""
+        start = chunk_index * chunk_size
+        st = path.stat()
+        if st.st_size <= CACHED_FILE_MAX_SIZE:
+            window = read_cached_bytes(path, st)[start : start + chunk_size]
+        else:
+            window = read_window(path, start, chunk_size)
+        # A multi-byte character split at a chunk edge decodes as U+FFFD.
+        return window.decode("utf-8", errors="replace")
     except Exception as e:
         return f"Error reading chunk: {e}"
 
 
-@mcp.resource("fs://chunks/{file_path}")
-def read_file_chunks(file_path: str) -> dict:
-    """Get chunk info and links for a file"""
+@mcp.resource("fs://chunk/{file_path}/{chunk_index}")
+async def get_file_chunk(file_path: str, chunk_index: int) -> str:
+    """Return a specific chunk from a file"""
+    return await asyncio.to_thread(_read_chunk, file_path, chunk_index, CHUNK_SIZE)
+
+
+@mcp.resource("fs://chunk/{file_path}/{chunk_index}/{chunk_size}")
+async def get_file_chunk_sized(
+    file_path: str, chunk_index: int, chunk_size: int
+) -> str:
+    """Return a specific chunk from a file using a caller-chosen chunk size in bytes (at most 1 MiB)"""
+    return await asyncio.to_thread(_read_chunk, file_path, chunk_index, chunk_size)
+
+
+def _read_file_chunks_sync(file_path: str) -> str:
     path = Path(file_path)
     if not path.is_file():
-        return {"error": f"'{file_path}' is not a valid file"}
+        return to_json({"error": f"'{file_path}' is not a valid file"})
 
     try:
-        text = path.read_text()
-        total_chunks = (len(text) + CHUNK_SIZE - 1) // CHUNK_SIZE
-        chunk_links = [f"fs://chunk/{file_path}/{i}" for i in range(total_chunks)]
-        return {
-            "file": file_path,
-            "length": len(text),
-            "chunk_size": CHUNK_SIZE,
-            "total_chunks": total_chunks,
-            "chunks": chunk_links,
-        }
+        # Chunks are byte windows, so the size alone gives the layout
+        length = path.stat().st_size
+        total_chunks = (length + CHUNK_SIZE - 1) // CHUNK_SIZE
+        # Clients expand the template themselves; listing every chunk URI
+        # would make the payload grow with the file size. Braces in the path
+        # are doubled so str.format() leaves them literal.
+        template_path = file_path.replace("{", "{{").replace("}", "}}")
+        return to_json(
+            {
+                "file": file_path,
+                "length": length,
+                "chunk_size": CHUNK_SIZE,
+                "total_chunks": total_chunks,
+                "chunk_uri_template": f"fs://chunk/{template_path}/{{index}}",
+                "index_range": [0, total_chunks],
+            }
+        )
     except Exception as e:
-        return {"error": f"Error processing file: {e}"}
+        return to_json({"error": f"Error processing file: {e}"})
+
+
+@mcp.resource("fs://chunks/{file_path}")
+async def read_file_chunks(file_path: str) -> str:
+    """Get chunk info and the chunk URI template for a file"""
+    return await asyncio.to_thread(_read_file_chunks_sync, file_path)
+
+
+@mcp.tool()
+async def read_resources(uris: list[str]) -> str:
+    """Read several resources in one call; failures are reported per URI"""
+    semaphore = asyncio.Semaphore(READ_CONCURRENCY)
+
+    async def read_one(uri: str) -> dict:
+        try:
+            async with semaphore:
+                contents = await mcp.read_resource(uri)
+        except Exception as e:
+            return {"uri": uri, "error": str(e)}
+        result = {"uri": uri}
+        for item in contents:
+            if isinstance(item.content, bytes):
+                result["blob"] = base64.b64encode(item.content).decode()
+            else:
+                result["text"] = item.content
+        return result
+
+    return to_json(await asyncio.gather(*(read_one(uri) for uri in uris)))
+
+
+def _list_directory_sync(directory_path: str) -> list[str]:
+    try:
+        with os.scandir(directory_path) as entries:
+            return [entry.name for entry in entries]
+    except (NotADirectoryError, FileNotFoundError):
+        return [f"Error: '{directory_path}' is not a valid directory"]
 
 
 @mcp.tool()
-def list_directory(directory_path: str) -> list[str]:
+async def list_directory(directory_path: str) -> list[str]:
     """List the contents of a directory"""
-    path = Path(directory_path)
-    if path.is_dir():
-        return [str(p.name) for p in path.iterdir()]
-    return [f"Error: '{directory_path}' is not a valid directory"]
+    return await asyncio.to_thread(_list_directory_sync, directory_path)
+
+
+class ProgressCoalescer:
+    """Keep only the latest progress per token and send it at most once per tick.
+
+    Updates are cheap dict writes; a background task started on the first
+    update flushes them every `interval` seconds, and leaving the context
+    flushes whatever is still pending so the final value always arrives.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[ProgressToken, float, float | None], Awaitable[None]],
+        interval: float = PROGRESS_FLUSH_INTERVAL,
+    ):
+        self._send = send
+        self._interval = interval
+        self._pending: dict[ProgressToken, tuple[float, float | None]] = {}
+        self._closed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def update(
+        self, token: ProgressToken | None, progress: float, total: float | None = None
+    ) -> None:
+        if token is None:
+            return
+        self._pending[token] = (progress, total)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        for token, (progress, total) in pending.items():
+            await self._send(token, progress, total)
+
+    async def _run(self) -> None:
+        while not self._closed.is_set():
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._closed.wait(), self._interval)
+            await self.flush()
+
+    async def __aenter__(self) -> "ProgressCoalescer":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._closed.set()
+        if self._task is not None:
+            await self._task
+        await self.flush()
+
+
+Matcher = Callable[[bytes | mmap.mmap], bool]
+
+
+def _compile_matcher(search_texts: list[str]) -> Matcher:
+    """Build the matcher once: memmem for one needle, a single regex pass for several"""
+    needles = [text.encode("utf-8") for text in search_texts]
+    if len(needles) == 1:
+        needle = needles[0]
+        return lambda buf: buf.find(needle) != -1
+    pattern = re.compile(b"|".join(re.escape(needle) for needle in needles))
+    return lambda buf: pattern.search(buf) is not None
+
+
+def _file_matches(file_path: str, matches: Matcher) -> bool:
+    """Run `matches` over the raw file bytes via mmap, without decoding"""
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return matches(b"")
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b"\x00", 0, BINARY_SNIFF_SIZE) != -1:
+                return False
+            return matches(mm)
+
+
+def _list_files(
+    path: Path,
+    include: re.Pattern[str] | None = None,
+    skip_dirs: frozenset[str] = SKIP_DIRS,
+) -> list[str]:
+    """Collect regular, non-binary files below `path` whose names match `include`"""
+    files = []
+    pending = [str(path)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                # DirEntry answers these from the directory listing, no stat()
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        pending.append(entry.path)
+                elif (
+                    entry.is_file(follow_symlinks=False)
+                    and os.path.splitext(entry.name)[1].lower() not in BINARY_EXTENSIONS
+                    and (include is None or include.match(entry.name))
+                ):
+                    files.append(entry.path)
+    return files
 
 
 @mcp.tool()
-def search_files(root_path: str, search_text: str) -> list[str]:
-    """Search for files that contain a specific string"""
+async def search_files(
+    root_path: str,
+    search_text: str | list[str],
+    include_glob: str = "*",
+    exclude_dirs: list[str] | None = None,
+) -> list[str]:
+    """Search for files that contain a specific string, or any of several strings.
+
+    Only file names matching `include_glob` are scanned, and directories named
+    in `exclude_dirs` (default: .git, node_modules, __pycache__, .venv) are
+    never entered.
+    """
     path = Path(root_path)
     if not path.is_dir():
         return [f"Error: '{root_path}' is not a valid directory"]
 
-    matching_files = []
-    for file_path in path.rglob("*"):
-        if file_path.is_file():
-            try:
-                if search_text in file_path.read_text():
-                    matching_files.append(str(file_path))
-            except Exception:
-                continue
+    search_texts = [search_text] if isinstance(search_text, str) else search_text
+    if not search_texts:
+        return ["Error: No search text given"]
+
+    context = mcp.get_context()
+    meta = context.request_context.meta
+    progress_token = meta.progressToken if meta else None
+
+    matches = _compile_matcher(search_texts)
+    semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+    include = (
+        None if include_glob == "*" else re.compile(fnmatch.translate(include_glob))
+    )
+    skip_dirs = SKIP_DIRS if exclude_dirs is None else frozenset(exclude_dirs)
+    files = await asyncio.to_thread(_list_files, path, include, skip_dirs)
+    scanned = 0
+
+    async with ProgressCoalescer(
+        context.session.send_progress_notification
+    ) as progress:
+
+        async def scan(file_path: str) -> str | None:
+            nonlocal scanned
+            async with semaphore:
+                try:
+                    found = await asyncio.to_thread(_file_matches, file_path, matches)
+                except (OSError, ValueError):
+                    found = False
+            scanned += 1
+            progress.update(progress_token, scanned, len(files))
+            return file_path if found else None
+
+        results = await asyncio.gather(*(scan(p) for p in files))
+    matching_files = [r for r in results if r is not None]
     return (
         matching_files
         if matching_files
-        else [f"No files contain '{search_text}' in '{root_path}'"]
+        else [f"No files contain '{' | '.join(search_texts)}' in '{root_path}'"]
     )
 
 
+CAPABILITY_PROBES = {
+    "experimental_tools": ClientCapabilities(experimental={"advanced_tools": {}}),
+    "sampling": ClientCapabilities(sampling=SamplingCapability()),
+    "roots": ClientCapabilities(roots=RootsCapability()),
+}
+
+
+@mcp.tool()
+async def check_capabilities(names: list[str]) -> dict[str, bool]:
+    """Check several client capabilities in one call; unknown names are skipped."""
+    context = mcp.get_context()
+    return {
+        name: bool(context.session.check_client_capability(CAPABILITY_PROBES[name]))
+        for name in names
+        if name in CAPABILITY_PROBES
+    }
+
+
 @mcp.tool()
 async def check_experimental_tools_capability() -> str:
     """Check if the client supports experimental advanced tools."""
@@ -125,8 +413,9 @@ async def check_experimental_tools_capability() -> str:
     if not context:
         return "Error: No session context available."
 
-    capability = ClientCapabilities(experimental={"advanced_tools": {}})
-    is_supported = context.session.check_client_capability(capability)
+    is_supported = context.session.check_client_capability(
+        CAPABILITY_PROBES["experimental_tools"]
+    )
     return "Supported" if is_supported else "Not supported"
 
 
@@ -137,9 +426,7 @@ async def check_sampling_capability(prompt: str) -> str:
     if not context:
         return "Error: No session context available."
 
-    if not context.session.check_client_capability(
-        ClientCapabilities(sampling=SamplingCapability())
-    ):
+    if not context.session.check_client_capability(CAPABILITY_PROBES["sampling"]):
         return "Error: Client does not support sampling capability."
 
     sampling_message = SamplingMessage(
@@ -174,9 +461,7 @@ async def check_roots_capability() -> list[str]:
     if not context:
         return ["Error: No session context available."]
 
-    if not context.session.check_client_capability(
-        ClientCapabilities(roots=RootsCapability())
-    ):
+    if not context.session.check_client_capability(CAPABILITY_PROBES["roots"]):
         return ["Error: Client does not support roots capability."]
 
     try:
@@ -193,41 +478,70 @@ async def check_roots_capability() -> list[str]:
         return [f"Error during root capability check: {str(e)}"]
 
 
+USAGE_INSTRUCTIONS = (
+    "📖 **Read-Only File System Usage Guide**\n\n"
+    "**Resources:**\n"
+    "- `fs://chunks/{file_path}` → Get file chunking info and the chunk URI template\n"
+    "- `fs://chunk/{file_path}/{chunk_index}` → Read a specific chunk from a file\n"
+    "- `fs://chunk/{file_path}/{chunk_index}/{chunk_size}` → Read a chunk of a custom size in bytes\n\n"
+    "**Tools:**\n"
+    "- `list_directory(directory_path)` → List contents of a directory\n"
+    "- `search_files(root_path, search_text, include_glob='*', exclude_dirs=None)` → Find files containing a string (or any of a list); narrow with a glob such as `*.py`\n"
+    "- `check_capabilities(names)` → Check client capabilities in one call\n\n"
+    "All operations are read-only. Use chunked reading for large files."
+)
+
+EXPLORATION_GUIDE = (
+    "🗂 **Explore Files Step-by-Step**\n\n"
+    "1. 🔍 Use `list_directory('/your/path')` to browse a folder.\n"
+    "2. 🧠 Use `search_files('/your/path', 'text')` to find files that contain certain content.\n"
+    "3. 📦 Use `fs://chunks/{file_path}` to get chunk metadata and the chunk URI template.\n"
+    "4. 📖 Use `fs://chunk/{file_path}/{chunk_index}` to view the contents chunk-by-chunk.\n\n"
+    "Follow these steps to safely inspect any file in a large or nested directory structure."
+)
+
+
+@lru_cache(maxsize=128)
+def _result_summary(file_path: str, total_chunks: int) -> str:
+    return f"The file '{file_path}' has been split into {total_chunks} chunk(s). Use the chunk resources to view each part."
+
+
 @mcp.prompt()
 def result_summary_prompt(file_path: str, total_chunks: int) -> str:
     """Summarize chunking result"""
-    return f"The file '{file_path}' has been split into {total_chunks} chunk(s). Use the chunk resources to view each part."
+    return _result_summary(file_path, total_chunks)
 
 
 @mcp.prompt()
 def usage_instructions() -> str:
     """General usage instructions"""
-    return (
-        "📖 **Read-Only File System Usage Guide**\n\n"
-        "**Resources:**\n"
-        "- `fs://chunks/{file_path}` → Get file chunking info and chunk links\n"
-        "- `fs://chunk/{file_path}/{chunk_index}` → Read a specific chunk from a file\n\n"
-        "**Tools:**\n"
-        "- `list_directory(directory_path)` → List contents of a directory\n"
-        "- `search_files(root_path, search_text)` → Find files containing a string\n\n"
-        "All operations are read-only. Use chunked reading for large files."
-    )
+    return USAGE_INSTRUCTIONS
 
 
 @mcp.prompt()
 def exploration_guide() -> str:
     """Step-by-step file navigation guide"""
-    return (
-        "🗂 **Explore Files Step-by-Step**\n\n"
-        "1. 🔍 Use `list_directory('/your/path')` to browse a folder.\n"
-        "2. 🧠 Use `search_files('/your/path', 'text')` to find files that contain certain content.\n"
-        "3. 📦 Use `fs://chunks/{file_path}` to get chunk metadata and chunk links.\n"
-        "4. 📖 Use `fs://chunk/{file_path}/{chunk_index}` to view the contents chunk-by-chunk.\n\n"
-        "Follow these steps to safely inspect any file in a large or nested directory structure."
-    )
+    return EXPLORATION_GUIDE
+
+
+@cache
+def create_app() -> Starlette:
+    """Build the SSE ASGI app once; repeated calls (reloads, tests) reuse it."""
+    return mcp.sse_app()
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(mcp.sse_app(), host="0.0.0.0", port=8080)
+    # uvicorn[standard] brings uvloop and httptools; the "auto" loop and
+    # http settings pick them up and fall back to asyncio/h11 without them.
+    # Access logging is off: every SSE post would otherwise emit a log line.
+    uvicorn.run(
+        create_app,
+        factory=True,
+        host="0.0.0.0",
+        port=8080,
+        loop="auto",
+        http="auto",
+        access_log=False,
+    )
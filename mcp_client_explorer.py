@@ -1,7 +1,9 @@
 # /// script
 # requires-python = ">=3.12"
 # dependencies = [
-#     "mcp==1.6.0"
+#     "mcp==1.6.0",
+#     "orjson",
+#     "uvloop; sys_platform != 'win32'"
 # ]
 # ///
 
@@ -20,48 +22,274 @@ from mcp import ClientSession, types, shared
 from mcp.client.sse import sse_client
 from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
 from typing import List, Dict, Any, Optional, Tuple
+from contextlib import AsyncExitStack
 from pydantic import ValidationError
-import json
+import orjson
 import asyncio
+import concurrent.futures
 import logging
-from dataclasses import dataclass
-from datetime import datetime
+import logging.handlers
+import atexit
+import queue
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+import time
+from datetime import timedelta
+try:
+    import uvloop
+except ImportError:  # uvloop is unavailable on Windows
+    uvloop = None
 
 # Configuration
 MCP_SERVER_URL = "http://localhost:8080/sse"
 CLIENT_NAME = "Enhanced-MCP-Agent"
 CLIENT_VERSION = "2.0.0"
+SESSION_PING_TIMEOUT = 5.0
+REQUEST_TIMEOUT = timedelta(seconds=30)  # per request; a stuck call raises instead of hanging
+SLOW_CALLBACK_DURATION = 0.05  # seconds, reported under MCP_DEBUG
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Server log levels mapped onto the stdlib ones for re-logging notifications
+LOG_LEVELS: Dict[types.LoggingLevel, int] = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "notice": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+    "alert": logging.CRITICAL,
+    "emergency": logging.CRITICAL,
+}
+
+# Demo values for known prompt arguments
+PROMPT_ARG_DEFAULTS = {
+    "file_path": __file__,
+    "total_chunks": "5",
+    "root_path": ".",
+    "search_text": "async",
+    "prompt": "Hello from the client!",
+}
+
+# Section separators for console output
+SEPARATOR = "=" * 60
+WIDE_SEPARATOR = "=" * 80
+
+# Fixed parts of the capabilities summary
+SUMMARY_HEADER = ("", WIDE_SEPARATOR, "🎯 MCP SERVER CAPABILITIES SUMMARY", WIDE_SEPARATOR)
+SUMMARY_FOOTER = WIDE_SEPARATOR + "\n\n"
+
+# Sampling reply; only the message and timestamp vary per call
+SAMPLING_RESPONSE_TEMPLATE = (
+    "🤖 **Enhanced Client Response**\n\n"
+    "📥 **Received:** {message}\n"
+    "🕒 **Timestamp:** {timestamp}\n"
+    f"🔧 **Client:** {CLIENT_NAME} v{CLIENT_VERSION}\n\n"
+    "✅ **Status:** Message processed successfully by autonomous agent"
+)
+
+# Setup logging: the event loop only enqueues records, and a listener thread
+# formats them and does the blocking writes to stderr
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(
+    logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 )
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# QueueHandler pre-renders the message; the listener applies the real format
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+logging.basicConfig(level=os.getenv("MCP_LOG", "INFO"), handlers=[queue_handler])
 logger = logging.getLogger(__name__)
 
+# Static callback payloads, validated once at import
+ROOT_LISTING_CONTENT = types.TextContent(
+    type="text",
+    text=(
+        "📂 Root Directory Contents:\n"
+        "📁 src/\n"
+        "📁 docs/\n"
+        "📁 tests/\n"
+        "📄 README.md\n"
+        "📄 requirements.txt\n"
+        "💻 main.py\n"
+        "🔧 config.json"
+    ),
+)
+
+ROOTS_RESULT = types.ListRootsResult(
+    roots=[
+        types.Root(uri="file:///", name="System Root"),
+        types.Root(uri="file:///home", name="Home Directory"),
+        types.Root(uri="file:///tmp", name="Temporary Directory"),
+        types.Root(uri="file:///var/log", name="Log Directory"),
+    ]
+)
 
-@dataclass
+
+# orjson is only needed for display. On the wire, mcp already parses incoming
+# frames with pydantic-core's native JSON parser, and httpx encodes outgoing
+# ones with the C-accelerated stdlib encoder.
+def dumps_indented(content: Any) -> str:
+    """Pretty-print JSON content with two-space indentation"""
+    return orjson.dumps(content, option=orjson.OPT_INDENT_2).decode()
+
+
+@dataclass(slots=True)
 class ServerCapabilities:
     """Track discovered server capabilities"""
-    prompts: List[types.Prompt] = None
-    tools: List[types.Tool] = None
-    resources: List[types.Resource] = None
-    resource_templates: List[types.ResourceTemplate] = None
+    prompts: List[types.Prompt] = field(default_factory=list)
+    tools: List[types.Tool] = field(default_factory=list)
+    resources: List[types.Resource] = field(default_factory=list)
+    resource_templates: List[types.ResourceTemplate] = field(default_factory=list)
+
+
+class PooledSession:
+    """An initialized session whose transport is owned by one dedicated task
+    
+    The anyio task groups inside sse_client and ClientSession must be exited
+    by the task that entered them, so the exit stack is opened and closed in
+    `_own`. Any other task asks for the close through an event.
+    """
+    
+    def __init__(self):
+        self.session: Optional[ClientSession] = None
+        self._ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._close_requested = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    @classmethod
+    async def open(cls, client: "EnhancedMCPClient") -> "PooledSession":
+        """Start the owner task and wait until its session is initialized"""
+        pooled = cls()
+        pooled._task = asyncio.create_task(pooled._own(client))
+        try:
+            pooled.session = await asyncio.shield(pooled._ready)
+        except BaseException:
+            # Cancelling the owner makes it unwind its own stack
+            pooled._task.cancel()
+            raise
+        return pooled
     
-    def __post_init__(self):
-        self.prompts = self.prompts or []
-        self.tools = self.tools or []
-        self.resources = self.resources or []
-        self.resource_templates = self.resource_templates or []
+    async def _own(self, client: "EnhancedMCPClient") -> None:
+        try:
+            stack, session = await client.open_session()
+        except asyncio.CancelledError:
+            self._ready.cancel()
+            raise
+        except BaseException as e:
+            # Handed to the waiting open(), which re-raises it
+            self._ready.set_exception(e)
+            return
+        
+        try:
+            self._ready.set_result(session)
+            await self._close_requested.wait()
+        finally:
+            try:
+                await stack.aclose()
+            except Exception as e:
+                logger.warning("Error closing pooled session: %s", e)
+    
+    async def close(self) -> None:
+        """Ask the owner task to close the session and wait until it has"""
+        self._close_requested.set()
+        if self._task is not None:
+            await asyncio.wait({self._task})
+
+
+class MCPSessionPool:
+    """Bounded pool of initialized sessions keyed by server URL and headers"""
+    
+    def __init__(self, max_sessions_per_url: int = 4, ttl: float = 300.0):
+        self.max_sessions_per_url = max_sessions_per_url
+        self.ttl = ttl
+        self._limits: Dict[Tuple, asyncio.Semaphore] = {}
+        self._idle: Dict[Tuple, List[Tuple[float, PooledSession]]] = {}
+        self._in_use: Dict[int, Tuple[Tuple, PooledSession]] = {}
+    
+    @staticmethod
+    def _key(client: "EnhancedMCPClient") -> Tuple:
+        headers = tuple(sorted((client.headers or {}).items()))
+        return client.server_url, headers
+    
+    async def acquire(self, client: "EnhancedMCPClient") -> ClientSession:
+        """Return a live idle session for the client's server, or open one"""
+        key = self._key(client)
+        limit = self._limits.setdefault(key, asyncio.Semaphore(self.max_sessions_per_url))
+        await limit.acquire()
+        
+        try:
+            idle = self._idle.setdefault(key, [])
+            while idle:
+                released_at, pooled = idle.pop()
+                if time.monotonic() - released_at < self.ttl and await self._is_alive(pooled.session):
+                    logger.info("♻️ Reusing session with %s", client.server_url)
+                    break
+                # Safe from any task: the owner task does the actual close
+                await pooled.close()
+            else:
+                pooled = await PooledSession.open(client)
+        except BaseException:
+            limit.release()
+            raise
+        
+        self._in_use[id(pooled.session)] = (key, pooled)
+        return pooled.session
+    
+    def release(self, session: ClientSession) -> None:
+        """Return a session to the idle list; sessions closed by close_all are ignored"""
+        entry = self._in_use.pop(id(session), None)
+        if entry is None:
+            return
+        key, pooled = entry
+        self._idle[key].append((time.monotonic(), pooled))
+        self._limits[key].release()
+    
+    async def close_all(self) -> None:
+        """Close every pooled session, idle or checked out"""
+        sessions = [pooled for idle in self._idle.values() for _, pooled in idle]
+        sessions += [pooled for _, pooled in self._in_use.values()]
+        # Checked-out sessions will never be released now, so free their slots
+        for key, _ in self._in_use.values():
+            self._limits[key].release()
+        self._idle.clear()
+        self._in_use.clear()
+        await asyncio.gather(*(pooled.close() for pooled in sessions))
+    
+    @staticmethod
+    async def _is_alive(session: ClientSession) -> bool:
+        try:
+            await asyncio.wait_for(session.send_ping(), SESSION_PING_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.warning("Pooled session is stale, reconnecting: %s", e)
+            return False
+
+
+# Sessions shared by every client in this process
+SESSION_POOL = MCPSessionPool()
 
 
 class EnhancedMCPClient:
     """Enhanced MCP Client with autonomous capabilities"""
     
-    def __init__(self, server_url: str = MCP_SERVER_URL):
+    def __init__(
+        self,
+        server_url: str = MCP_SERVER_URL,
+        headers: Optional[Dict[str, str]] = None,
+        pool: Optional["MCPSessionPool"] = None,
+    ):
         self.server_url = server_url
+        self.headers = headers
+        self.pool = pool or SESSION_POOL
         self.session: Optional[ClientSession] = None
         self.capabilities = ServerCapabilities()
+        self.tools_by_name: Dict[str, types.Tool] = {}
         self.client_capabilities = {
             'sampling': False,
             'roots': False,
@@ -74,9 +302,10 @@ class EnhancedMCPClient:
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
+        # Hand the session back to the pool for the next caller
         if self.session:
-            # Cleanup if needed
-            pass
+            self.pool.release(self.session)
+            self.session = None
     
     # ================================
     # CLIENT CAPABILITY CALLBACKS
@@ -90,17 +319,18 @@ class EnhancedMCPClient:
         """Handle sampling requests from the server (LLM completions)"""
         logger.info("🤖 [Sampling] Server requested LLM completion")
         
-        try:
-            # Check if this is a roots-related request
-            if hasattr(arguments, 'metadata') and arguments.metadata:
-                root = types.Root(**arguments.metadata)
-                return await self.handle_root_request(context, root)
+        # Check if this is a roots-related request; only metadata carrying a
+        # uri can describe a root, so skip validating anything else
+        metadata = arguments.metadata
+        if metadata and "uri" in metadata:
+            try:
+                root = types.Root(**metadata)
+            except (ValidationError, TypeError) as e:
+                logger.warning("Sampling callback validation error: %s", e)
             else:
-                return await self.handle_text_sampling(context, arguments)
-                
-        except (ValidationError, TypeError) as e:
-            logger.warning(f"Sampling callback validation error: {e}")
-            return await self.handle_text_sampling(context, arguments)
+                return await self.handle_root_request(context, root)
+        
+        return await self.handle_text_sampling(context, arguments)
     
     async def handle_root_request(
         self,
@@ -108,32 +338,24 @@ class EnhancedMCPClient:
         root: types.Root,
     ) -> types.CreateMessageResult:
         """Handle root directory listing requests"""
-        logger.info(f"📁 [Roots] Processing root request: {root.uri}")
+        logger.info("📁 [Roots] Processing root request: %s", root.uri)
         
         try:
             # Simulate directory listing for the root
             if "file://" in root.uri:
-                fake_listing = (
-                    "📂 Root Directory Contents:\n"
-                    "📁 src/\n"
-                    "📁 docs/\n"
-                    "📁 tests/\n"
-                    "📄 README.md\n"
-                    "📄 requirements.txt\n"
-                    "💻 main.py\n"
-                    "🔧 config.json"
-                )
+                content = ROOT_LISTING_CONTENT
             else:
                 fake_listing = f"📂 Contents of {root.name}:\n- Directory listing not available for {root.uri}"
+                content = types.TextContent(type="text", text=fake_listing)
             
             return types.CreateMessageResult(
                 role="user",
-                content=types.TextContent(type="text", text=fake_listing),
+                content=content,
                 model="root-reader-v2",
             )
             
         except Exception as e:
-            logger.error(f"Error handling root request: {e}")
+            logger.error("Error handling root request: %s", e)
             return types.CreateMessageResult(
                 role="user",
                 content=types.TextContent(
@@ -154,15 +376,12 @@ class EnhancedMCPClient:
         else:
             message_text = arguments.messages[0].content.text
         
-        logger.info(f"💬 [Sampling] Processing message: {message_text[:50]}...")
+        logger.info("💬 [Sampling] Processing message: %.50s...", message_text)
         
         # Simulate an intelligent response
-        response_text = (
-            f"🤖 **Enhanced Client Response**\n\n"
-            f"📥 **Received:** {message_text}\n"
-            f"🕒 **Timestamp:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"🔧 **Client:** {CLIENT_NAME} v{CLIENT_VERSION}\n\n"
-            f"✅ **Status:** Message processed successfully by autonomous agent"
+        response_text = SAMPLING_RESPONSE_TEMPLATE.format(
+            message=message_text,
+            timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
         )
         
         return types.CreateMessageResult(
@@ -179,43 +398,65 @@ class EnhancedMCPClient:
         """Provide available filesystem roots"""
         logger.info("🗂️ [Roots] Client providing available roots")
         
-        roots = [
-            types.Root(uri="file:///", name="System Root"),
-            types.Root(uri="file:///home", name="Home Directory"),
-            types.Root(uri="file:///tmp", name="Temporary Directory"),
-            types.Root(uri="file:///var/log", name="Log Directory"),
-        ]
-        
-        return types.ListRootsResult(roots=roots)
+        return ROOTS_RESULT
     
-    async def logging_callback(self, level: str, message: str):
+    async def logging_callback(self, params: types.LoggingMessageNotificationParams):
         """Handle server logging messages"""
-        logger.info(f"🔊 [Server-{level.upper()}] {message}")
+        level = LOG_LEVELS[params.level]
+        if logger.isEnabledFor(level):
+            logger.log(level, "🔊 [Server-%s] %s", params.level.upper(), params.data)
     
     async def message_handler(self, message: types.JSONRPCMessage):
         """Handle incoming JSON-RPC messages"""
-        logger.debug(f"📨 [Message] Received: {message}")
+        logger.debug("📨 [Message] Received: %s", message)
     
     # ================================
     # SESSION MANAGEMENT
     # ================================
     
     async def initialize_session(self) -> ClientSession:
-        """Initialize the MCP session with full capabilities"""
+        """Check out an initialized MCP session from the pool"""
+        self.session = await self.pool.acquire(self)
+        return self.session
+    
+    async def open_session(self) -> Tuple[AsyncExitStack, ClientSession]:
+        """Open and initialize a new MCP session with full capabilities"""
         logger.info(f"🚀 Initializing session with {self.server_url}")
         
-        # Create session with all callbacks
-        read, write = await sse_client(self.server_url).__aenter__()
-        
-        session = ClientSession(
-            read,
-            write,
-            sampling_callback=self.sampling_callback,
-            list_roots_callback=self.list_roots_callback,
-            logging_callback=self.logging_callback,
-            message_handler=self.message_handler,
-        )
+        # Enter both context managers so the SSE stream and the session's
+        # receive loop are torn down together when the stack is closed.
+        # No socket tuning is needed here: asyncio transports (and uvloop's)
+        # already set TCP_NODELAY, so small JSON-RPC frames are not held
+        # back by Nagle on either the SSE stream or the message POSTs.
+        stack = AsyncExitStack()
+        try:
+            read, write = await stack.enter_async_context(
+                sse_client(self.server_url, headers=self.headers)
+            )
+            session = await stack.enter_async_context(
+                ClientSession(
+                    read,
+                    write,
+                    read_timeout_seconds=REQUEST_TIMEOUT,
+                    sampling_callback=self.sampling_callback,
+                    list_roots_callback=self.list_roots_callback,
+                    logging_callback=self.logging_callback,
+                    # Only hook every incoming frame when it will actually be logged
+                    message_handler=(
+                        self.message_handler if logger.isEnabledFor(logging.DEBUG) else None
+                    ),
+                )
+            )
+            result = await self._handshake(session)
+        except BaseException:
+            await stack.aclose()
+            raise
         
+        logger.info(f"✅ Session initialized with protocol version {result.protocolVersion}")
+        return stack, session
+    
+    async def _handshake(self, session: ClientSession) -> types.InitializeResult:
+        """Send initialize with the advertised client capabilities"""
         # Configure client capabilities
         sampling = types.SamplingCapability()
         roots = types.RootsCapability(listChanged=True)
@@ -253,9 +494,7 @@ class EnhancedMCPClient:
             )
         )
         
-        logger.info(f"✅ Session initialized with protocol version {result.protocolVersion}")
-        self.session = session
-        return session
+        return result
     
     # ================================
     # DISCOVERY AND EXPLORATION
@@ -268,37 +507,45 @@ class EnhancedMCPClient:
         
         logger.info("🔍 Discovering server capabilities...")
         
+        # The four listings are independent, so request them concurrently
+        prompts_result, tools_result, templates_result, resources_result = await asyncio.gather(
+            self.session.list_prompts(),
+            self.session.list_tools(),
+            self.session.list_resource_templates(),
+            self.session.list_resources(),
+            return_exceptions=True,
+        )
+        
         # Discover prompts
-        try:
-            prompts_result = await self.session.list_prompts()
+        if isinstance(prompts_result, Exception):
+            logger.warning(f"Failed to discover prompts: {prompts_result}")
+        else:
             self.capabilities.prompts = prompts_result.prompts
             logger.info(f"📋 Found {len(self.capabilities.prompts)} prompts")
-        except Exception as e:
-            logger.warning(f"Failed to discover prompts: {e}")
         
         # Discover tools
-        try:
-            tools_result = await self.session.list_tools()
+        if isinstance(tools_result, Exception):
+            logger.warning(f"Failed to discover tools: {tools_result}")
+        else:
             self.capabilities.tools = tools_result.tools
             logger.info(f"🛠️ Found {len(self.capabilities.tools)} tools")
-        except Exception as e:
-            logger.warning(f"Failed to discover tools: {e}")
         
         # Discover resource templates
-        try:
-            templates_result = await self.session.list_resource_templates()
+        if isinstance(templates_result, Exception):
+            logger.warning(f"Failed to discover resource templates: {templates_result}")
+        else:
             self.capabilities.resource_templates = templates_result.resourceTemplates
             logger.info(f"📄 Found {len(self.capabilities.resource_templates)} resource templates")
-        except Exception as e:
-            logger.warning(f"Failed to discover resource templates: {e}")
         
         # Discover resources
-        try:
-            resources_result = await self.session.list_resources()
+        if isinstance(resources_result, Exception):
+            logger.warning(f"Failed to discover resources: {resources_result}")
+        else:
             self.capabilities.resources = resources_result.resources
             logger.info(f"🗂️ Found {len(self.capabilities.resources)} resources")
-        except Exception as e:
-            logger.warning(f"Failed to discover resources: {e}")
+        
+        # Index tools once so capability gating is a dict lookup
+        self.tools_by_name = {t.name: t for t in self.capabilities.tools}
         
         return self.capabilities
     
@@ -306,56 +553,59 @@ class EnhancedMCPClient:
         """Test various client capabilities with the server"""
         logger.info("🧪 Testing client capabilities...")
         
-        results = {}
-        
-        # Test sampling capability
-        try:
-            if any(t.name == "check_sampling_capability" for t in self.capabilities.tools):
-                result = await self.session.call_tool(
-                    "check_sampling_capability",
-                    {"prompt": "Test prompt for capability checking"}
-                )
-                success = "✅ Supported" in result.content[0].text
-                results['sampling'] = success
-                logger.info(f"🤖 Sampling capability: {'✅' if success else '❌'}")
-            else:
-                results['sampling'] = False
-                logger.info("🤖 Sampling capability: ❓ (tool not available)")
-        except Exception as e:
-            results['sampling'] = False
-            logger.warning(f"Sampling test failed: {e}")
-        
-        # Test roots capability
-        try:
-            if any(t.name == "check_roots_capability" for t in self.capabilities.tools):
-                result = await self.session.call_tool("check_roots_capability", {})
-                success = "✅ Roots capability supported" in result.content[0].text
-                results['roots'] = success
-                logger.info(f"🗂️ Roots capability: {'✅' if success else '❌'}")
-            else:
-                results['roots'] = False
-                logger.info("🗂️ Roots capability: ❓ (tool not available)")
-        except Exception as e:
-            results['roots'] = False
-            logger.warning(f"Roots test failed: {e}")
-        
-        # Test experimental tools capability
-        try:
-            if any(t.name == "check_experimental_tools_capability" for t in self.capabilities.tools):
-                result = await self.session.call_tool("check_experimental_tools_capability", {})
-                success = "✅ Supported" in result.content[0].text
-                results['experimental_tools'] = success
-                logger.info(f"🔬 Experimental tools: {'✅' if success else '❌'}")
-            else:
-                results['experimental_tools'] = False
-                logger.info("🔬 Experimental tools: ❓ (tool not available)")
-        except Exception as e:
-            results['experimental_tools'] = False
-            logger.warning(f"Experimental tools test failed: {e}")
+        # The probes are independent, so run them concurrently
+        sampling, roots, experimental_tools = await asyncio.gather(
+            self._probe_capability(
+                "check_sampling_capability",
+                {"prompt": "Test prompt for capability checking"},
+                "✅ Sampling successful",
+                "🤖 Sampling capability",
+                "Sampling",
+            ),
+            self._probe_capability(
+                "check_roots_capability",
+                {},
+                "✅ Roots capability supported",
+                "🗂️ Roots capability",
+                "Roots",
+            ),
+            self._probe_capability(
+                "check_experimental_tools_capability",
+                {},
+                "Experimental Tools Capability: ✅ Supported",
+                "🔬 Experimental tools",
+                "Experimental tools",
+            ),
+        )
         
+        results = {
+            'sampling': sampling,
+            'roots': roots,
+            'experimental_tools': experimental_tools,
+        }
         self.client_capabilities = results
         return results
     
+    async def _probe_capability(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        prefix: str,
+        label: str,
+        test_name: str,
+    ) -> bool:
+        """Call a capability-check tool and report whether its reply starts with prefix"""
+        try:
+            if tool_name in self.tools_by_name:
+                result = await self.session.call_tool(tool_name, arguments)
+                success = result.content[0].text.startswith(prefix)
+                logger.info(f"{label}: {'✅' if success else '❌'}")
+                return success
+            logger.info(f"{label}: ❓ (tool not available)")
+        except Exception as e:
+            logger.warning(f"{test_name} test failed: {e}")
+        return False
+    
     # ================================
     # INTELLIGENT INTERACTIONS
     # ================================
@@ -364,54 +614,61 @@ class EnhancedMCPClient:
         """Intelligently explore the filesystem"""
         logger.info(f"🧭 Starting intelligent filesystem exploration from: {root_path}")
         
+        # The steps don't depend on each other, so issue their tool calls
+        # together and print the results in step order once they arrive
+        steps = []
+        
         # Step 1: List directory contents
-        if any(t.name == "list_directory" for t in self.capabilities.tools):
+        if "list_directory" in self.tools_by_name:
             logger.info("📂 Step 1: Listing directory contents...")
-            try:
-                result = await self.session.call_tool(
+            steps.append((
+                "📂 DIRECTORY CONTENTS",
+                "Failed to list directory",
+                self.session.call_tool(
                     "list_directory",
                     {"directory_path": root_path, "include_hidden": False}
-                )
-                print("\n" + "="*60)
-                print("📂 DIRECTORY CONTENTS")
-                print("="*60)
-                for item in result.content:
-                    print(item.text)
-            except Exception as e:
-                logger.error(f"Failed to list directory: {e}")
+                ),
+            ))
         
         # Step 2: Search for interesting files
         logger.info("🔍 Step 2: Searching for Python files...")
-        if any(t.name == "search_files" for t in self.capabilities.tools):
-            try:
-                result = await self.session.call_tool(
+        if "search_files" in self.tools_by_name:
+            steps.append((
+                "🔍 SEARCH RESULTS (Python functions)",
+                "Failed to search files",
+                self.session.call_tool(
                     "search_files",
                     {"root_path": root_path, "search_text": "def ", "max_results": 5}
-                )
-                print("\n" + "="*60)
-                print("🔍 SEARCH RESULTS (Python functions)")
-                print("="*60)
-                for item in result.content:
-                    print(item.text)
-            except Exception as e:
-                logger.error(f"Failed to search files: {e}")
+                ),
+            ))
         
         # Step 3: Get detailed info about a specific file
         logger.info("📊 Step 3: Getting detailed file information...")
-        if any(t.name == "get_file_info" for t in self.capabilities.tools):
-            try:
-                # Try to get info about the client script itself
-                result = await self.session.call_tool(
+        if "get_file_info" in self.tools_by_name:
+            # Try to get info about the client script itself
+            steps.append((
+                "📊 FILE INFORMATION",
+                "Failed to get file info",
+                self.session.call_tool(
                     "get_file_info",
                     {"file_path": __file__}
-                )
-                print("\n" + "="*60)
-                print("📊 FILE INFORMATION")
-                print("="*60)
-                for item in result.content:
-                    print(item.text)
-            except Exception as e:
-                logger.error(f"Failed to get file info: {e}")
+                ),
+            ))
+        
+        results = await asyncio.gather(
+            *(call for _, _, call in steps), return_exceptions=True
+        )
+        
+        for (title, error, _), result in zip(steps, results):
+            if isinstance(result, Exception):
+                logger.error(f"{error}: {result}")
+                continue
+            print("\n" + SEPARATOR)
+            print(title)
+            print(SEPARATOR)
+            # Partition once by the content type tag; only text items are printed
+            texts = [item.text for item in result.content if item.type == "text"]
+            print("\n".join(texts))
     
     async def demonstrate_resources(self) -> None:
         """Demonstrate resource usage"""
@@ -420,34 +677,44 @@ class EnhancedMCPClient:
         # Read sample resource
         try:
             logger.info("📖 Reading sample resource...")
-            data, content = await self.session.read_resource("fs://sample")
-            print("\n" + "="*60)
+            result = await self.session.read_resource("fs://sample")
+            content = orjson.loads(result.contents[0].text)
+            print("\n" + SEPARATOR)
             print("📚 SAMPLE RESOURCE")
-            print("="*60)
-            print(json.dumps(content, indent=2))
+            print(SEPARATOR)
+            print(dumps_indented(content))
         except Exception as e:
             logger.error(f"Failed to read sample resource: {e}")
         
         # Demonstrate file chunking
         try:
-            current_file = __file__
+            # Template parameters match a single path segment, so pass the
+            # script relative to the working directory the server shares
+            current_file = os.path.relpath(__file__)
             logger.info(f"📦 Reading chunk metadata for: {current_file}")
-            data, content = await self.session.read_resource(f"fs://chunks/{current_file}")
-            print("\n" + "="*60)
+            # Fetch the first chunk alongside the metadata rather than after it
+            result, chunk_result = await asyncio.gather(
+                self.session.read_resource(f"fs://chunks/{current_file}"),
+                self.session.read_resource(f"fs://chunk/{current_file}/0"),
+                return_exceptions=True,
+            )
+            if isinstance(result, Exception):
+                raise result
+            content = orjson.loads(result.contents[0].text)
+            print("\n" + SEPARATOR)
             print("📦 FILE CHUNK METADATA")
-            print("="*60)
-            print(json.dumps(content, indent=2))
+            print(SEPARATOR)
+            print(dumps_indented(content))
             
-            # Read first chunk
+            # Show first chunk
             if isinstance(content, dict) and content.get('total_chunks', 0) > 0:
                 logger.info("📖 Reading first chunk...")
-                chunk_data, chunk_content = await self.session.read_resource(
-                    f"fs://chunk/{current_file}/0"
-                )
-                print("\n" + "="*60)
+                if isinstance(chunk_result, Exception):
+                    raise chunk_result
+                print("\n" + SEPARATOR)
                 print("📖 FIRST CHUNK CONTENT")
-                print("="*60)
-                print(chunk_content)
+                print(SEPARATOR)
+                print(chunk_result.contents[0].text)
                 
         except Exception as e:
             logger.error(f"Failed to demonstrate chunking: {e}")
@@ -456,40 +723,40 @@ class EnhancedMCPClient:
         """Demonstrate prompt usage"""
         logger.info("💬 Demonstrating prompt capabilities...")
         
-        for prompt in self.capabilities.prompts[:3]:  # Show first 3 prompts
-            try:
-                logger.info(f"💬 Executing prompt: {prompt.name}")
-                
-                # Prepare arguments based on prompt requirements
-                args = {}
-                if prompt.arguments:
-                    for arg in prompt.arguments:
-                        if arg.name == "file_path":
-                            args[arg.name] = __file__
-                        elif arg.name == "total_chunks":
-                            args[arg.name] = "5"
-                        elif arg.name == "root_path":
-                            args[arg.name] = "."
-                        elif arg.name == "search_text":
-                            args[arg.name] = "async"
-                        elif arg.name == "prompt":
-                            args[arg.name] = "Hello from the client!"
-                
-                result = await self.session.get_prompt(prompt.name, arguments=args)
-                print(f"\n{'='*60}")
-                print(f"💬 PROMPT: {prompt.name}")
-                print("="*60)
-                for msg in result.messages:
-                    print(f"🧾 {msg.role.capitalize()}: {msg.content.text}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to execute prompt {prompt.name}: {e}")
+        prompts = self.capabilities.prompts[:3]  # Show first 3 prompts
+        calls = []
+        for prompt in prompts:
+            logger.info(f"💬 Executing prompt: {prompt.name}")
+            
+            # Prepare arguments based on prompt requirements
+            args = {
+                arg.name: PROMPT_ARG_DEFAULTS[arg.name]
+                for arg in prompt.arguments or ()
+                if arg.name in PROMPT_ARG_DEFAULTS
+            }
+            
+            calls.append(self.session.get_prompt(prompt.name, arguments=args))
+        
+        # Fetch every prompt at once, then print them in order
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        
+        for prompt, result in zip(prompts, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to execute prompt {prompt.name}: {result}")
+                continue
+            print("\n" + SEPARATOR)
+            print(f"💬 PROMPT: {prompt.name}")
+            print(SEPARATOR)
+            for msg in result.messages:
+                print(f"🧾 {msg.role.capitalize()}: {msg.content.text}")
     
     async def send_progress_updates(self) -> None:
         """Send progress notifications during operations"""
         logger.info("⏳ Sending progress updates...")
         
         try:
+            # Submit every update back-to-back instead of pacing them with
+            # sleeps; the writes queue on the session stream in order
             for i in range(5):
                 progress = (i + 1) / 5
                 await self.session.send_progress_notification(
@@ -498,7 +765,6 @@ class EnhancedMCPClient:
                     total=1.0
                 )
                 logger.info(f"📊 Progress: {progress*100:.0f}%")
-                await asyncio.sleep(0.5)  # Simulate work
                 
         except Exception as e:
             logger.error(f"Failed to send progress updates: {e}")
@@ -529,11 +795,14 @@ class EnhancedMCPClient:
             # Print summary
             self.print_capabilities_summary()
             
-            # Run demonstrations
-            await self.demonstrate_prompts()
-            await self.demonstrate_resources()
-            await self.explore_filesystem()
-            await self.send_progress_updates()
+            # Run demonstrations; they share no state, so overlap their
+            # round-trips (each prints whole sections once its calls land)
+            await asyncio.gather(
+                self.demonstrate_prompts(),
+                self.demonstrate_resources(),
+                self.explore_filesystem(),
+                self.send_progress_updates(),
+            )
             
             # Final status
             logger.info("🎉 Comprehensive demonstration completed successfully!")
@@ -544,33 +813,158 @@ class EnhancedMCPClient:
     
     def print_capabilities_summary(self) -> None:
         """Print a summary of discovered capabilities"""
-        print(f"\n{'='*80}")
-        print(f"🎯 MCP SERVER CAPABILITIES SUMMARY")
-        print(f"{'='*80}")
-        
-        print(f"📋 Prompts: {len(self.capabilities.prompts)}")
-        for prompt in self.capabilities.prompts:
-            args_str = f" ({len(prompt.arguments)} args)" if prompt.arguments else ""
-            print(f"   💬 {prompt.name}{args_str}")
+        # Collect the whole summary and write it in one call
+        lines = list(SUMMARY_HEADER)
+        
+        lines.append(f"📋 Prompts: {len(self.capabilities.prompts)}")
+        lines += [
+            f"   💬 {prompt.name} ({len(prompt.arguments)} args)" if prompt.arguments
+            else f"   💬 {prompt.name}"
+            for prompt in self.capabilities.prompts
+        ]
         
-        print(f"\n🛠️ Tools: {len(self.capabilities.tools)}")
-        for tool in self.capabilities.tools:
-            print(f"   🔧 {tool.name}: {tool.description[:60]}...")
+        lines.append(f"\n🛠️ Tools: {len(self.capabilities.tools)}")
+        lines += [
+            f"   🔧 {tool.name}: {tool.description[:60]}..."
+            for tool in self.capabilities.tools
+        ]
         
-        print(f"\n📄 Resource Templates: {len(self.capabilities.resource_templates)}")
-        for template in self.capabilities.resource_templates:
-            print(f"   🗂️ {template.uriTemplate}")
+        lines.append(f"\n📄 Resource Templates: {len(self.capabilities.resource_templates)}")
+        lines += [
+            f"   🗂️ {template.uriTemplate}"
+            for template in self.capabilities.resource_templates
+        ]
         
-        print(f"\n🗂️ Resources: {len(self.capabilities.resources)}")
-        for resource in self.capabilities.resources:
-            print(f"   📚 {resource.uri}")
+        lines.append(f"\n🗂️ Resources: {len(self.capabilities.resources)}")
+        lines += [f"   📚 {resource.uri}" for resource in self.capabilities.resources]
         
-        print(f"\n🧪 Client Capabilities:")
-        for cap, supported in self.client_capabilities.items():
-            status = "✅" if supported else "❌"
-            print(f"   {status} {cap.replace('_', ' ').title()}")
+        lines.append("\n🧪 Client Capabilities:")
+        lines += [
+            f"   {'✅' if supported else '❌'} {cap.replace('_', ' ').title()}"
+            for cap, supported in self.client_capabilities.items()
+        ]
         
-        print(f"{'='*80}\n")
+        lines.append(SUMMARY_FOOTER)
+        sys.stdout.write("\n".join(lines))
+
+
+# ================================
+# SYNCHRONOUS FACADE
+# ================================
+
+class AsyncLoopThread:
+    """Background thread that owns a long-lived asyncio event loop"""
+    
+    def __init__(self):
+        self.loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="mcp-event-loop", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coro, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+    
+    def stop(self):
+        """Stop the loop and wait for the thread to exit"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class MCPClientWrapper:
+    """Thread-safe synchronous facade over EnhancedMCPClient
+    
+    Every call is submitted to one background event loop, so threads share
+    a loop and a session instead of paying for asyncio.run() per call. The
+    session is opened and closed by a single long-lived task on that loop.
+    """
+    
+    def __init__(
+        self,
+        server_url: str = MCP_SERVER_URL,
+        loop_thread: Optional[AsyncLoopThread] = None,
+    ):
+        self._owns_loop = loop_thread is None
+        self._loop_thread = loop_thread or AsyncLoopThread()
+        # A private pool, so close() shuts this wrapper's session even when
+        # the loop thread is shared with other wrappers
+        self.client = EnhancedMCPClient(server_url, pool=MCPSessionPool(max_sessions_per_url=1))
+        self._closing: Optional[asyncio.Event] = None
+        self._closed = False
+        
+        started: concurrent.futures.Future = concurrent.futures.Future()
+        self._serving = asyncio.run_coroutine_threadsafe(self._serve(started), self._loop_thread.loop)
+        try:
+            started.result()
+        except BaseException:
+            self._closed = True
+            if self._owns_loop:
+                self._loop_thread.stop()
+            raise
+    
+    async def _serve(self, started: concurrent.futures.Future) -> None:
+        """Own the session from open to close; close() only sets the event"""
+        self._closing = asyncio.Event()
+        try:
+            async with self.client:
+                await self.client.initialize_session()
+                await self.client.discover_server_capabilities()
+                started.set_result(None)
+                await self._closing.wait()
+        except BaseException as e:
+            if not started.done():
+                started.set_exception(e)
+            raise
+        finally:
+            await self.client.pool.close_all()
+    
+    def call_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> types.CallToolResult:
+        """Call a server tool"""
+        return self._loop_thread.submit(
+            self.client.session.call_tool(name, arguments or {}), timeout
+        )
+    
+    def read_resource(self, uri: str, timeout: Optional[float] = None) -> types.ReadResourceResult:
+        """Read a server resource"""
+        return self._loop_thread.submit(self.client.session.read_resource(uri), timeout)
+    
+    def get_prompt(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> types.GetPromptResult:
+        """Render a server prompt"""
+        return self._loop_thread.submit(
+            self.client.session.get_prompt(name, arguments=arguments), timeout
+        )
+    
+    def close(self):
+        """Close the session, stopping the loop if this wrapper started it"""
+        if self._closed:
+            return
+        self._closed = True
+        self._loop_thread.loop.call_soon_threadsafe(self._closing.set)
+        try:
+            self._serving.result()
+        finally:
+            if self._owns_loop:
+                self._loop_thread.stop()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 
 # ================================
@@ -590,7 +984,17 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Fatal error: {e}")
         raise
+    finally:
+        await SESSION_POOL.close_all()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop's libuv-backed loop speeds up the SSE reads and JSON-RPC writes
+    # MCP_DEBUG turns on asyncio debug mode, which logs any callback that
+    # holds the loop longer than SLOW_CALLBACK_DURATION
+    with asyncio.Runner(
+        debug=bool(os.getenv("MCP_DEBUG")),
+        loop_factory=uvloop.new_event_loop if uvloop else None
+    ) as runner:
+        runner.get_loop().slow_callback_duration = SLOW_CALLBACK_DURATION
+        runner.run(main())
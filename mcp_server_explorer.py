@@ -2,6 +2,7 @@
 # requires-python = ">=3.12"
 # dependencies = [
 #     "mcp==1.6.0",
+#     "orjson",
 #     "uvicorn==0.34.0"
 # ]
 # ///
@@ -32,16 +33,43 @@ from mcp.types import (
 )
 from starlette.routing import Route
 from pathlib import Path
-from typing import Literal, List, Dict, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, lru_cache, partial
+from typing import Callable, Iterable, Iterator, Literal, List, Dict, Any, Tuple
 from mcp.server.session import ServerSession
 from pydantic import BaseModel
 import asyncio
+import codecs
 import logging
+import mmap
+import orjson
+import os
+import re
+import threading
+import time
+import weakref
 
 # Configuration
 CHUNK_SIZE = 1024
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB limit for reading files
-ALLOWED_EXTENSIONS = {'.txt', '.py', '.js', '.json', '.md', '.yaml', '.yml', '.xml', '.html', '.css'}
+MAX_FILE_SIZE_TEXT = f"{MAX_FILE_SIZE // (1024*1024)}MB"
+FILE_CACHE_SIZE = 32  # decoded files kept in memory
+CACHED_FILE_MAX_SIZE = 1024 * 1024  # larger files are indexed, not kept decoded
+READ_BLOCK_SIZE = 1024 * 1024  # bytes decoded at a time while indexing a large file
+ALLOWED_EXTENSIONS = frozenset({'.txt', '.py', '.js', '.json', '.md', '.yaml', '.yml', '.xml', '.html', '.css'})
+ALLOWED_EXTENSIONS_TEXT = ', '.join(sorted(ALLOWED_EXTENSIONS))
+ICON_BY_EXTENSION = {
+    **dict.fromkeys(('.py', '.js', '.html', '.css'), "💻"),
+    **dict.fromkeys(('.txt', '.md', '.json', '.yaml', '.yml'), "📝"),
+}
+DEFAULT_ICON = "📄"
+BINARY_SNIFF_SIZE = 8192  # leading bytes checked for NUL before a file is searched
+SEARCH_WORKERS = min(32, (os.cpu_count() or 1) * 2)  # threads scanning file contents
+LISTING_CACHE_SIZE = 256  # directory listings kept in memory
+LISTING_TTL = 5.0  # seconds a listing is reused; file sizes can change without touching the directory mtime
+# Bytes that are not valid UTF-8, as decoded by surrogateescape (one character per byte)
+ESCAPED_BYTES = re.compile('[\udc80-\udcff]')
 
 # Initialize FastMCP server
 mcp = FastMCP(name="EnhancedFileSystemServer")
@@ -69,14 +97,241 @@ class ChunkInfo(BaseModel):
     chunks: List[str]
 
 
+# ================================
+# FILE CACHE
+# ================================
+
+def decode_text(raw: bytes) -> str:
+    """Decode UTF-8 with every invalid byte shown as one U+FFFD.
+    
+    This matches the surrogateescape chunk index, so a file reports the same
+    length and chunk boundaries whether or not it is small enough to cache.
+    """
+    return ESCAPED_BYTES.sub('\ufffd', raw.decode('utf-8', errors='surrogateescape'))
+
+
+@lru_cache(maxsize=FILE_CACHE_SIZE)
+def _load_text(path_str: str, mtime_ns: int, size: int) -> str:
+    """Decode a file once per (path, mtime, size); a modified file gets a new key."""
+    return decode_text(Path(path_str).read_bytes())
+
+
+@lru_cache(maxsize=FILE_CACHE_SIZE)
+def _chunk_offsets(path_str: str, mtime_ns: int, size: int) -> Tuple[int, Tuple[int, ...]]:
+    """Character length and the byte offset of every chunk boundary, computed once per file version."""
+    # surrogateescape turns each undecodable byte into exactly one character
+    # and back, so re-encoded chunk lengths are exact byte counts. The file is
+    # decoded block by block, so at most one block of text is held at a time.
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='surrogateescape')
+    offsets = [0]
+    length = 0
+    pending = ''
+    with open(path_str, 'rb') as f:
+        for block in iter(partial(f.read, READ_BLOCK_SIZE), b''):
+            text = pending + decoder.decode(block)
+            complete = len(text) - len(text) % CHUNK_SIZE
+            for start in range(0, complete, CHUNK_SIZE):
+                chunk = text[start:start + CHUNK_SIZE]
+                offsets.append(offsets[-1] + len(chunk.encode('utf-8', errors='surrogateescape')))
+            length += complete
+            pending = text[complete:]
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        offsets.append(offsets[-1] + len(pending.encode('utf-8', errors='surrogateescape')))
+        length += len(pending)
+    return length, tuple(offsets)
+
+
+def text_length(path_str: str, mtime_ns: int, size: int) -> int:
+    """Return the length of a file in characters, cached while the file is unchanged."""
+    if size <= CACHED_FILE_MAX_SIZE:
+        return len(_load_text(path_str, mtime_ns, size))
+    return _chunk_offsets(path_str, mtime_ns, size)[0]
+
+
+def read_text_chunk(path_str: str, mtime_ns: int, size: int, chunk_index: int) -> str:
+    """Return one CHUNK_SIZE-character chunk; large files only decode that chunk's bytes."""
+    if size <= CACHED_FILE_MAX_SIZE:
+        start = chunk_index * CHUNK_SIZE
+        return _load_text(path_str, mtime_ns, size)[start:start + CHUNK_SIZE]
+    _, offsets = _chunk_offsets(path_str, mtime_ns, size)
+    if not 0 <= chunk_index < len(offsets) - 1:
+        return ""
+    start, end = offsets[chunk_index], offsets[chunk_index + 1]
+    # One positioned read straight into a bytes object, no buffered file wrapper
+    fd = os.open(path_str, os.O_RDONLY)
+    try:
+        raw = os.pread(fd, end - start, start)
+    finally:
+        os.close(fd)
+    return decode_text(raw)
+
+
+def to_json(payload: Dict[str, Any]) -> str:
+    """Serialize a resource payload; FastMCP sends str results without re-encoding."""
+    return orjson.dumps(payload).decode()
+
+
+@lru_cache(maxsize=FILE_CACHE_SIZE)
+def _chunk_metadata(
+    file_path: str, path_str: str, size: int, mtime_ns: int, mtime: float, ctime: float
+) -> str:
+    """Encoded chunk metadata for one version of a file; the stat fields form the cache key."""
+    path = Path(path_str)
+    content_length = text_length(path_str, mtime_ns, size)
+    first_chunk = read_text_chunk(path_str, mtime_ns, size, 0)
+    total_chunks = max(1, (content_length + CHUNK_SIZE - 1) // CHUNK_SIZE)
+    chunk_links = [f"fs://chunk/{file_path}/{i}" for i in range(total_chunks)]
+    
+    return to_json({
+        "file_path": file_path,
+        "file_name": path.name,
+        "file_size_bytes": size,
+        "content_length": content_length,
+        "chunk_size": CHUNK_SIZE,
+        "total_chunks": total_chunks,
+        "chunks": chunk_links,
+        "file_info": {
+            "extension": path.suffix,
+            "created": ctime,
+            "modified": mtime,
+            "is_readable": True
+        },
+        "preview": first_chunk[:200] + "..." if content_length > 200 else first_chunk
+    })
+
+
+# ================================
+# SEARCH HELPERS
+# ================================
+
+def file_extension(name: str) -> str:
+    """Lowercased extension of a file name, as os.path.splitext finds it.
+    
+    Extensions are nearly always lowercase already; those are returned as-is
+    instead of being copied by str.lower().
+    """
+    extension = os.path.splitext(name)[1]
+    return extension if extension.islower() else extension.lower()
+
+
+def compile_search(search_text: str) -> re.Pattern:
+    """Compile a case-insensitive literal pattern once per search.
+    
+    ASCII needles become a bytes pattern that runs directly on the mapped file;
+    anything else needs Unicode case folding and is matched on decoded text.
+    """
+    if search_text.isascii():
+        return re.compile(re.escape(search_text.encode('ascii')), re.IGNORECASE)
+    return re.compile(re.escape(search_text), re.IGNORECASE)
+
+
+def count_newlines(buf: mmap.mmap | str, newline: bytes | str, end: int) -> int:
+    """Count newlines in buf[:end] without copying that prefix out of the buffer."""
+    if isinstance(buf, str):
+        return buf.count(newline, 0, end)
+    # mmap has no count(); step through it with find() instead of slicing
+    count = 0
+    pos = buf.find(newline, 0, end)
+    while pos != -1:
+        count += 1
+        pos = buf.find(newline, pos + 1, end)
+    return count
+
+
+def find_match(file_path: str, pattern: re.Pattern) -> Tuple[int, str] | None:
+    """Return (line number, line) of the first match of `pattern` in a file, or None; binary files never match."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b'\x00', 0, BINARY_SNIFF_SIZE) != -1:
+                return None
+            if isinstance(pattern.pattern, bytes):
+                # Searched in place; only the matching line gets decoded
+                buf, newline = mm, b'\n'
+            else:
+                buf, newline = mm[:].decode('utf-8', errors='replace'), '\n'
+            
+            match = pattern.search(buf)
+            if match is None:
+                return None
+            line_start = buf.rfind(newline, 0, match.start()) + 1
+            line_end = buf.find(newline, match.end())
+            line = buf[line_start:line_end if line_end != -1 else len(buf)]
+            line_num = count_newlines(buf, newline, line_start) + 1
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', errors='replace')
+            return line_num, line
+
+
+def iter_search_candidates(root: str, include_hidden: bool = False) -> Iterator[str]:
+    """Yield files under `root` with an allowed extension and size, breadth first.
+    
+    Hidden directories are pruned, not walked, unless `include_hidden` is set.
+    """
+    pending = deque([root])
+    while pending:
+        try:
+            it = os.scandir(pending.popleft())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if not include_hidden and entry.name.startswith('.'):
+                    continue
+                try:
+                    # Like rglob, never descend through directory symlinks
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    # Name checks first; they need no system call
+                    elif (file_extension(entry.name) in ALLOWED_EXTENSIONS
+                          and entry.is_file()
+                          and entry.stat().st_size <= MAX_FILE_SIZE):
+                        yield entry.path
+                except OSError:
+                    continue
+
+
+def scan_files(
+    paths: Iterable[str], pattern: re.Pattern, ahead: int
+) -> Iterator[Tuple[str, Callable[[], Tuple[int, str] | None]]]:
+    """Yield (path, result getter for find_match) in walk order.
+    
+    Up to `ahead` scans are queued on a worker pool; whatever is still queued
+    when the caller stops iterating is cancelled. With `ahead` <= 1 each file
+    is only read when its result is asked for.
+    """
+    if ahead <= 1:
+        for file_path in paths:
+            yield file_path, partial(find_match, file_path, pattern)
+        return
+    
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as pool:
+        window = deque()
+        try:
+            for file_path in paths:
+                window.append((file_path, pool.submit(find_match, file_path, pattern)))
+                if len(window) >= ahead:
+                    file_path, scan = window.popleft()
+                    yield file_path, scan.result
+            while window:
+                file_path, scan = window.popleft()
+                yield file_path, scan.result
+        finally:
+            for _, scan in window:
+                scan.cancel()
+
+
 # ================================
 # RESOURCE ENDPOINTS
 # ================================
 
 @mcp.resource("fs://sample")
-def get_sample_resource() -> Dict[str, Any]:
+@cache
+def get_sample_resource() -> str:
     """Return a sample resource payload with structured data."""
-    return {
+    return to_json({
         "name": "Enhanced File System Server",
         "version": "2.0.0",
         "description": "A comprehensive MCP server for file system operations with chunking support.",
@@ -102,151 +357,201 @@ def get_sample_resource() -> Dict[str, Any]:
             ]
         },
         "limits": {
-            "max_file_size": f"{MAX_FILE_SIZE // (1024*1024)}MB",
+            "max_file_size": MAX_FILE_SIZE_TEXT,
             "chunk_size": f"{CHUNK_SIZE} characters",
-            "allowed_extensions": list(ALLOWED_EXTENSIONS)
+            "allowed_extensions": sorted(ALLOWED_EXTENSIONS)
         }
-    }
+    })
 
 
-@mcp.resource("fs://chunk/{file_path}/{chunk_index}")
-def get_file_chunk(file_path: str, chunk_index: int) -> str:
-    """Return a specific chunk from a file with enhanced error handling."""
+def _read_chunk(file_path: str, chunk_index: int) -> str:
     try:
+        # Reject unsupported types before any filesystem access
+        suffix = Path(file_path).suffix
+        if suffix.lower() not in ALLOWED_EXTENSIONS:
+            return f"Error: File type '{suffix}' not supported. Allowed: {ALLOWED_EXTENSIONS_TEXT}"
+        
         path = Path(file_path).resolve()
         
         # Security check - ensure file exists and is readable
         if not path.is_file():
             return f"Error: '{file_path}' is not a valid file or does not exist"
         
-        # Check file extension
+        # A symlink may still point at an unsupported file type
         if path.suffix.lower() not in ALLOWED_EXTENSIONS:
-            return f"Error: File type '{path.suffix}' not supported. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+            return f"Error: File type '{path.suffix}' not supported. Allowed: {ALLOWED_EXTENSIONS_TEXT}"
         
         # Check file size
-        if path.stat().st_size > MAX_FILE_SIZE:
-            return f"Error: File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+        stat_info = path.stat()
+        if stat_info.st_size > MAX_FILE_SIZE:
+            return f"Error: File too large. Maximum size: {MAX_FILE_SIZE_TEXT}"
         
         # Read and return chunk
-        text = path.read_text(encoding='utf-8', errors='replace')
+        key = (str(path), stat_info.st_mtime_ns, stat_info.st_size)
+        content_length = text_length(*key)
         start = chunk_index * CHUNK_SIZE
         end = start + CHUNK_SIZE
         
-        if start >= len(text):
-            return f"Error: Chunk {chunk_index} does not exist. File has {(len(text) + CHUNK_SIZE - 1) // CHUNK_SIZE} chunks."
+        if chunk_index < 0 or start >= content_length:
+            return f"Error: Chunk {chunk_index} does not exist. File has {(content_length + CHUNK_SIZE - 1) // CHUNK_SIZE} chunks."
         
-        chunk_content = text[start:end]
+        chunk_content = read_text_chunk(*key, chunk_index)
         metadata = {
             "chunk_index": chunk_index,
             "start_pos": start,
-            "end_pos": min(end, len(text)),
+            "end_pos": min(end, content_length),
             "chunk_length": len(chunk_content),
-            "is_final_chunk": end >= len(text)
+            "is_final_chunk": end >= content_length
         }
         
-        return f"--- Chunk {chunk_index} Metadata ---\n{metadata}\n\n--- Chunk Content ---\n{chunk_content}"
+        return f"--- Chunk {chunk_index} Metadata ---\n{to_json(metadata)}\n\n--- Chunk Content ---\n{chunk_content}"
         
     except UnicodeDecodeError:
         return f"Error: Cannot decode file '{file_path}' as UTF-8 text"
     except PermissionError:
         return f"Error: Permission denied reading '{file_path}'"
     except Exception as e:
-        logger.error(f"Error reading chunk {chunk_index} from {file_path}: {e}")
+        logger.error("Error reading chunk %s from %s: %s", chunk_index, file_path, e)
         return f"Error reading chunk: {str(e)}"
 
 
-@mcp.resource("fs://chunks/{file_path}")
-def read_file_chunks(file_path: str) -> Dict[str, Any]:
-    """Get comprehensive chunk info and links for a file."""
+@mcp.resource("fs://chunk/{file_path}/{chunk_index}")
+async def get_file_chunk(file_path: str, chunk_index: int) -> str:
+    """Return a specific chunk from a file with enhanced error handling."""
+    # Disk reads run in a worker thread so other sessions keep being served.
+    return await asyncio.to_thread(_read_chunk, file_path, chunk_index)
+
+
+def _read_file_chunks_sync(file_path: str) -> str:
     try:
+        # Reject unsupported types before any filesystem access
+        suffix = Path(file_path).suffix
+        if suffix.lower() not in ALLOWED_EXTENSIONS:
+            return to_json({"error": f"File type '{suffix}' not supported. Allowed: {ALLOWED_EXTENSIONS_TEXT}"})
+        
         path = Path(file_path).resolve()
         
         if not path.is_file():
-            return {"error": f"'{file_path}' is not a valid file"}
+            return to_json({"error": f"'{file_path}' is not a valid file"})
         
-        # Check file extension
+        # A symlink may still point at an unsupported file type
         if path.suffix.lower() not in ALLOWED_EXTENSIONS:
-            return {"error": f"File type '{path.suffix}' not supported. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"}
+            return to_json({"error": f"File type '{path.suffix}' not supported. Allowed: {ALLOWED_EXTENSIONS_TEXT}"})
         
         # Get file stats
         stat_info = path.stat()
         file_size = stat_info.st_size
         
         if file_size > MAX_FILE_SIZE:
-            return {"error": f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"}
-        
-        # Read file content
-        text = path.read_text(encoding='utf-8', errors='replace')
-        total_chunks = max(1, (len(text) + CHUNK_SIZE - 1) // CHUNK_SIZE)
-        chunk_links = [f"fs://chunk/{file_path}/{i}" for i in range(total_chunks)]
-        
-        return {
-            "file_path": file_path,
-            "file_name": path.name,
-            "file_size_bytes": file_size,
-            "content_length": len(text),
-            "chunk_size": CHUNK_SIZE,
-            "total_chunks": total_chunks,
-            "chunks": chunk_links,
-            "file_info": {
-                "extension": path.suffix,
-                "created": stat_info.st_ctime,
-                "modified": stat_info.st_mtime,
-                "is_readable": True
-            },
-            "preview": text[:200] + "..." if len(text) > 200 else text
-        }
+            return to_json({"error": f"File too large. Maximum size: {MAX_FILE_SIZE_TEXT}"})
+        
+        # Build (or reuse) the metadata for this version of the file
+        return _chunk_metadata(
+            file_path,
+            str(path),
+            file_size,
+            stat_info.st_mtime_ns,
+            stat_info.st_mtime,
+            stat_info.st_ctime,
+        )
         
     except UnicodeDecodeError:
-        return {"error": f"Cannot decode file '{file_path}' as UTF-8 text"}
+        return to_json({"error": f"Cannot decode file '{file_path}' as UTF-8 text"})
     except PermissionError:
-        return {"error": f"Permission denied accessing '{file_path}'"}
+        return to_json({"error": f"Permission denied accessing '{file_path}'"})
     except Exception as e:
-        logger.error(f"Error processing file {file_path}: {e}")
-        return {"error": f"Error processing file: {str(e)}"}
+        logger.error("Error processing file %s: %s", file_path, e)
+        return to_json({"error": f"Error processing file: {str(e)}"})
+
+
+@mcp.resource("fs://chunks/{file_path}")
+async def read_file_chunks(file_path: str) -> str:
+    """Get comprehensive chunk info and links for a file."""
+    return await asyncio.to_thread(_read_file_chunks_sync, file_path)
 
 
 # ================================
 # TOOL IMPLEMENTATIONS
 # ================================
 
-@mcp.tool()
-def list_directory(directory_path: str, include_hidden: bool = False) -> List[str]:
-    """List the contents of a directory with detailed information."""
+def format_size(size: int) -> str:
+    """Human-readable size for listings; only sizes of 1MB and up go through a float."""
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f}MB"
+    if size >= 1024:
+        return f"{size >> 10}KB"
+    return f"{size}B"
+
+
+# Listings keyed by (resolved path, include_hidden) -> (directory mtime_ns, taken at, lines)
+_listing_cache: Dict[Tuple[str, bool], Tuple[int, float, List[str]]] = {}
+_listing_lock = threading.Lock()
+
+
+def _scan_directory(path: Path, include_hidden: bool) -> List[str]:
+    items = []
+    # DirEntry carries the file type from the directory listing, so
+    # only files need a stat() call (for their size).
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        # Skip hidden files unless requested
+        if not include_hidden and entry.name.startswith('.'):
+            continue
+            
+        try:
+            if entry.is_dir():
+                items.append(f"📁 {entry.name}/")
+            else:
+                size_str = format_size(entry.stat().st_size)
+                icon = ICON_BY_EXTENSION.get(file_extension(entry.name), DEFAULT_ICON)
+                items.append(f"{icon} {entry.name} ({size_str})")
+        except (PermissionError, OSError):
+            items.append(f"❌ {entry.name} (access denied)")
+    
+    return items
+
+
+def get_listing(path: Path, include_hidden: bool) -> List[str]:
+    """Return a directory's entry lines, reusing a recent listing while its mtime is unchanged."""
+    key = (str(path), include_hidden)
+    mtime_ns = path.stat().st_mtime_ns
+    now = time.monotonic()
+    with _listing_lock:
+        cached = _listing_cache.get(key)
+        if cached is not None and cached[0] == mtime_ns and now - cached[1] < LISTING_TTL:
+            return cached[2]
+    
+    items = _scan_directory(path, include_hidden)
+    with _listing_lock:
+        _listing_cache.pop(key, None)
+        _listing_cache[key] = (mtime_ns, now, items)
+        if len(_listing_cache) > LISTING_CACHE_SIZE:
+            del _listing_cache[next(iter(_listing_cache))]
+    return items
+
+
+@lru_cache(maxsize=LISTING_CACHE_SIZE)
+def count_entries(path_str: str, mtime_ns: int) -> Tuple[int, int]:
+    """Count (subdirectories, files) once per directory version; adding or removing entries bumps its mtime."""
+    dirs = files = 0
+    with os.scandir(path_str) as it:
+        for entry in it:
+            if entry.is_dir():
+                dirs += 1
+            else:
+                files += 1
+    return dirs, files
+
+
+def _list_directory_sync(directory_path: str, include_hidden: bool) -> List[str]:
     try:
         path = Path(directory_path).resolve()
         
         if not path.is_dir():
             return [f"Error: '{directory_path}' is not a valid directory"]
         
-        items = []
-        for item_path in sorted(path.iterdir()):
-            # Skip hidden files unless requested
-            if not include_hidden and item_path.name.startswith('.'):
-                continue
-                
-            try:
-                stat_info = item_path.stat()
-                if item_path.is_dir():
-                    items.append(f"📁 {item_path.name}/")
-                else:
-                    size_mb = stat_info.st_size / (1024 * 1024)
-                    if size_mb >= 1:
-                        size_str = f"{size_mb:.1f}MB"
-                    elif stat_info.st_size >= 1024:
-                        size_str = f"{stat_info.st_size // 1024}KB"
-                    else:
-                        size_str = f"{stat_info.st_size}B"
-                    
-                    icon = "📄"
-                    if item_path.suffix.lower() in {'.py', '.js', '.html', '.css'}:
-                        icon = "💻"
-                    elif item_path.suffix.lower() in {'.txt', '.md', '.json', '.yaml', '.yml'}:
-                        icon = "📝"
-                    
-                    items.append(f"{icon} {item_path.name} ({size_str})")
-            except (PermissionError, OSError):
-                items.append(f"❌ {item_path.name} (access denied)")
+        items = get_listing(path, include_hidden)
         
         if not items:
             return [f"Directory '{directory_path}' is empty or no readable items found"]
@@ -256,13 +561,18 @@ def list_directory(directory_path: str, include_hidden: bool = False) -> List[st
     except PermissionError:
         return [f"Error: Permission denied accessing '{directory_path}'"]
     except Exception as e:
-        logger.error(f"Error listing directory {directory_path}: {e}")
+        logger.error("Error listing directory %s: %s", directory_path, e)
         return [f"Error listing directory: {str(e)}"]
 
 
 @mcp.tool()
-def search_files(root_path: str, search_text: str, max_results: int = 20) -> List[str]:
-    """Search for files that contain a specific string with improved results."""
+async def list_directory(directory_path: str, include_hidden: bool = False) -> List[str]:
+    """List the contents of a directory with detailed information."""
+    # Filesystem work runs in a worker thread so other sessions keep being served.
+    return await asyncio.to_thread(_list_directory_sync, directory_path, include_hidden)
+
+
+def _search_files_sync(root_path: str, search_text: str, max_results: int, include_hidden: bool) -> List[str]:
     try:
         path = Path(root_path).resolve()
         
@@ -271,39 +581,31 @@ def search_files(root_path: str, search_text: str, max_results: int = 20) -> Lis
         
         matching_files = []
         searched_count = 0
-        
-        for file_path in path.rglob("*"):
+        pattern = compile_search(search_text)
+        
+        # Directory walking and file scanning overlap: the walk feeds a
+        # worker pool and results are consumed in walk order. A single hit
+        # is wanted as soon as possible, so nothing is read ahead for it.
+        ahead = 0 if max_results == 1 else 2 * SEARCH_WORKERS
+        candidates = iter_search_candidates(str(path), include_hidden)
+        for file_path, scan in scan_files(candidates, pattern, ahead):
             if len(matching_files) >= max_results:
                 break
                 
-            if file_path.is_file() and file_path.suffix.lower() in ALLOWED_EXTENSIONS:
-                try:
-                    # Skip large files
-                    if file_path.stat().st_size > MAX_FILE_SIZE:
-                        continue
-                        
-                    content = file_path.read_text(encoding='utf-8', errors='replace')
-                    searched_count += 1
-                    
-                    if search_text.lower() in content.lower():
-                        # Find the line containing the search text
-                        lines = content.split('\n')
-                        matching_line = None
-                        line_num = 0
-                        
-                        for i, line in enumerate(lines, 1):
-                            if search_text.lower() in line.lower():
-                                matching_line = line.strip()[:100]
-                                line_num = i
-                                break
-                        
-                        result = f"📄 {file_path.relative_to(path)}"
-                        if matching_line:
-                            result += f" (line {line_num}: {matching_line})"
-                        matching_files.append(result)
-                        
-                except (UnicodeDecodeError, PermissionError, OSError):
-                    continue
+            try:
+                found = scan()
+            except (UnicodeDecodeError, PermissionError, OSError, ValueError):
+                continue
+            searched_count += 1
+            
+            if found is not None:
+                line_num, line = found
+                matching_line = line.strip()[:100]
+                
+                result = f"📄 {os.path.relpath(file_path, path)}"
+                if matching_line:
+                    result += f" (line {line_num}: {matching_line})"
+                matching_files.append(result)
         
         if not matching_files:
             return [f"No files contain '{search_text}' in '{root_path}' (searched {searched_count} files)"]
@@ -317,13 +619,17 @@ def search_files(root_path: str, search_text: str, max_results: int = 20) -> Lis
         return results
         
     except Exception as e:
-        logger.error(f"Error searching files in {root_path}: {e}")
+        logger.error("Error searching files in %s: %s", root_path, e)
         return [f"Error searching files: {str(e)}"]
 
 
 @mcp.tool()
-def get_file_info(file_path: str) -> List[str]:
-    """Get detailed information about a file."""
+async def search_files(root_path: str, search_text: str, max_results: int = 20, include_hidden: bool = False) -> List[str]:
+    """Search for files that contain a specific string with improved results."""
+    return await asyncio.to_thread(_search_files_sync, root_path, search_text, max_results, include_hidden)
+
+
+def _get_file_info_sync(file_path: str) -> List[str]:
     try:
         path = Path(file_path).resolve()
         
@@ -348,10 +654,10 @@ def get_file_info(file_path: str) -> List[str]:
             # If it's a readable text file, show chunk info
             if path.suffix.lower() in ALLOWED_EXTENSIONS and stat_info.st_size <= MAX_FILE_SIZE:
                 try:
-                    content = path.read_text(encoding='utf-8', errors='replace')
-                    total_chunks = max(1, (len(content) + CHUNK_SIZE - 1) // CHUNK_SIZE)
+                    content_length = text_length(str(path), stat_info.st_mtime_ns, stat_info.st_size)
+                    total_chunks = max(1, (content_length + CHUNK_SIZE - 1) // CHUNK_SIZE)
                     info.extend([
-                        f"   📦 Content Length: {len(content):,} characters",
+                        f"   📦 Content Length: {content_length:,} characters",
                         f"   🧩 Total Chunks: {total_chunks}",
                         f"   🔗 Chunk Resource: fs://chunks/{file_path}",
                     ])
@@ -359,33 +665,55 @@ def get_file_info(file_path: str) -> List[str]:
                     info.append("   ❌ Content: Unable to read as text")
         else:
             try:
-                items = list(path.iterdir())
-                dirs = sum(1 for item in items if item.is_dir())
-                files = len(items) - dirs
+                dirs, files = count_entries(str(path), stat_info.st_mtime_ns)
                 info.extend([
                     f"   📁 Subdirectories: {dirs}",
                     f"   📄 Files: {files}",
-                    f"   📊 Total Items: {len(items)}",
+                    f"   📊 Total Items: {dirs + files}",
                 ])
             except PermissionError:
                 info.append("   ❌ Contents: Permission denied")
         
         # Add timestamps
-        import datetime
-        modified_time = datetime.datetime.fromtimestamp(stat_info.st_mtime)
-        info.append(f"   🕒 Modified: {modified_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        modified_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat_info.st_mtime))
+        info.append(f"   🕒 Modified: {modified_time}")
         
         return info
         
     except Exception as e:
-        logger.error(f"Error getting file info for {file_path}: {e}")
+        logger.error("Error getting file info for %s: %s", file_path, e)
         return [f"Error getting file information: {str(e)}"]
 
 
+@mcp.tool()
+async def get_file_info(file_path: str) -> List[str]:
+    """Get detailed information about a file."""
+    return await asyncio.to_thread(_get_file_info_sync, file_path)
+
+
 # ================================
 # CLIENT CAPABILITY TESTING TOOLS
 # ================================
 
+CAPABILITY_PROBES = {
+    "experimental_tools": ClientCapabilities(experimental={"advanced_tools": {}}),
+    "sampling": ClientCapabilities(sampling=SamplingCapability()),
+    "roots": ClientCapabilities(roots=RootsCapability()),
+}
+
+# A client's capabilities are fixed by its initialize request, so the answers
+# are kept per session and dropped together with it.
+_capability_cache: "weakref.WeakKeyDictionary[ServerSession, Dict[str, bool]]" = weakref.WeakKeyDictionary()
+
+
+def client_supports(session: ServerSession, name: str) -> bool:
+    """Return whether the session's client declared the capability in CAPABILITY_PROBES[name]."""
+    answers = _capability_cache.setdefault(session, {})
+    if name not in answers:
+        answers[name] = bool(session.check_client_capability(CAPABILITY_PROBES[name]))
+    return answers[name]
+
+
 @mcp.tool()
 async def check_experimental_tools_capability() -> str:
     """Check if the client supports experimental advanced tools."""
@@ -394,14 +722,13 @@ async def check_experimental_tools_capability() -> str:
         if not context:
             return "Error: No session context available."
 
-        capability = ClientCapabilities(experimental={"advanced_tools": {}})
-        is_supported = context.session.check_client_capability(capability)
+        is_supported = client_supports(context.session, "experimental_tools")
         
         result = "✅ Supported" if is_supported else "❌ Not supported"
         return f"Experimental Tools Capability: {result}"
         
     except Exception as e:
-        logger.error(f"Error checking experimental tools capability: {e}")
+        logger.error("Error checking experimental tools capability: %s", e)
         return f"Error checking capability: {str(e)}"
 
 
@@ -413,9 +740,7 @@ async def check_sampling_capability(prompt: str = "Hello! Please respond with a
         if not context:
             return "Error: No session context available."
 
-        if not context.session.check_client_capability(
-            ClientCapabilities(sampling=SamplingCapability())
-        ):
+        if not client_supports(context.session, "sampling"):
             return "❌ Error: Client does not support sampling capability."
 
         sampling_message = SamplingMessage(
@@ -432,7 +757,7 @@ async def check_sampling_capability(prompt: str = "Hello! Please respond with a
             return "❌ No response received from sampling request."
             
     except Exception as e:
-        logger.error(f"Error in sampling capability check: {e}")
+        logger.error("Error in sampling capability check: %s", e)
         return f"Error during sampling: {str(e)}"
 
 
@@ -444,9 +769,7 @@ async def check_roots_capability() -> List[str]:
         if not context:
             return ["Error: No session context available."]
 
-        if not context.session.check_client_capability(
-            ClientCapabilities(roots=RootsCapability())
-        ):
+        if not client_supports(context.session, "roots"):
             return ["❌ Error: Client does not support roots capability."]
 
         response = await context.session.list_roots()
@@ -464,7 +787,7 @@ async def check_roots_capability() -> List[str]:
         return results
         
     except Exception as e:
-        logger.error(f"Error during root capability check: {e}")
+        logger.error("Error during root capability check: %s", e)
         return [f"Error during root capability check: {str(e)}"]
 
 
@@ -492,35 +815,39 @@ def result_summary_prompt(file_path: str, total_chunks: str) -> str:
         return f"File '{file_path}' has been processed. Use the chunk resources to view each part."
 
 
+# Built once at import; every input is a module constant
+USAGE_INSTRUCTIONS = (
+    "📖 **Enhanced File System Server - Usage Guide**\n\n"
+    "## 🗂️ **Resources**\n"
+    "• `fs://sample` → Server information and capabilities\n"
+    "• `fs://chunks/{file_path}` → Get file metadata and chunk links\n"
+    "• `fs://chunk/{file_path}/{index}` → Read specific chunk (0-based indexing)\n\n"
+    "## 🛠️ **Tools**\n"
+    "### File Operations\n"
+    "• `list_directory(path, include_hidden=False)` → Browse directory contents\n"
+    "• `search_files(root_path, search_text, max_results=20, include_hidden=False)` → Find files with text\n"
+    "• `get_file_info(file_path)` → Get detailed file information\n\n"
+    "### Capability Testing\n"
+    "• `check_sampling_capability(prompt)` → Test LLM integration\n"
+    "• `check_roots_capability()` → Test filesystem access\n"
+    "• `check_experimental_tools_capability()` → Test experimental features\n\n"
+    "## 📋 **Limitations**\n"
+    f"• Maximum file size: {MAX_FILE_SIZE_TEXT}\n"
+    f"• Chunk size: {CHUNK_SIZE:,} characters\n"
+    f"• Supported types: {ALLOWED_EXTENSIONS_TEXT}\n"
+    "• All operations are read-only for security\n\n"
+    "## 💡 **Best Practices**\n"
+    "1. Start with `list_directory()` to explore\n"
+    "2. Use `get_file_info()` to check file details\n"
+    "3. Use `fs://chunks/` for large file metadata\n"
+    "4. Read chunks sequentially for better performance"
+)
+
+
 @mcp.prompt()
 def usage_instructions() -> str:
     """Comprehensive usage instructions for the enhanced file system server."""
-    return (
-        "📖 **Enhanced File System Server - Usage Guide**\n\n"
-        "## 🗂️ **Resources**\n"
-        "• `fs://sample` → Server information and capabilities\n"
-        "• `fs://chunks/{file_path}` → Get file metadata and chunk links\n"
-        "• `fs://chunk/{file_path}/{index}` → Read specific chunk (0-based indexing)\n\n"
-        "## 🛠️ **Tools**\n"
-        "### File Operations\n"
-        "• `list_directory(path, include_hidden=False)` → Browse directory contents\n"
-        "• `search_files(root_path, search_text, max_results=20)` → Find files with text\n"
-        "• `get_file_info(file_path)` → Get detailed file information\n\n"
-        "### Capability Testing\n"
-        "• `check_sampling_capability(prompt)` → Test LLM integration\n"
-        "• `check_roots_capability()` → Test filesystem access\n"
-        "• `check_experimental_tools_capability()` → Test experimental features\n\n"
-        "## 📋 **Limitations**\n"
-        f"• Maximum file size: {MAX_FILE_SIZE // (1024*1024)}MB\n"
-        f"• Chunk size: {CHUNK_SIZE:,} characters\n"
-        f"• Supported types: {', '.join(sorted(ALLOWED_EXTENSIONS))}\n"
-        "• All operations are read-only for security\n\n"
-        "## 💡 **Best Practices**\n"
-        "1. Start with `list_directory()` to explore\n"
-        "2. Use `get_file_info()` to check file details\n"
-        "3. Use `fs://chunks/` for large file metadata\n"
-        "4. Read chunks sequentially for better performance"
-    )
+    return USAGE_INSTRUCTIONS
 
 
 @mcp.prompt()
@@ -546,7 +873,7 @@ def exploration_guide() -> str:
         "📚 Process large files chunk by chunk\n\n"
         "## 🎯 **Advanced Tips**\n"
         "• Use `include_hidden=True` in `list_directory()` to see hidden files\n"
-        "• Increase `max_results` in `search_files()` for broader searches\n"
+        "• Increase `max_results` in `search_files()` for broader searches, and set `include_hidden=True` to search hidden folders\n"
         "• Check file info before reading to avoid processing huge files\n"
         "• Use the preview in `fs://chunks/` resource to quickly assess content\n\n"
         "## 🔧 **Troubleshooting**\n"
@@ -597,19 +924,26 @@ def capability_testing_guide() -> str:
 async def main():
     """Main server startup function."""
     logger.info("🚀 Starting Enhanced File System MCP Server...")
-    logger.info(f"📋 Configuration:")
-    logger.info(f"   • Chunk size: {CHUNK_SIZE:,} characters")
-    logger.info(f"   • Max file size: {MAX_FILE_SIZE // (1024*1024)}MB")
-    logger.info(f"   • Supported extensions: {', '.join(sorted(ALLOWED_EXTENSIONS))}")
+    logger.info("📋 Configuration:")
+    logger.info("   • Chunk size: %s characters", f"{CHUNK_SIZE:,}")
+    logger.info("   • Max file size: %s", MAX_FILE_SIZE_TEXT)
+    logger.info("   • Supported extensions: %s", ALLOWED_EXTENSIONS_TEXT)
     logger.info("🌐 Server ready at http://localhost:8080")
 
 
+@cache
+def create_app() -> Starlette:
+    """Build the SSE application once and reuse it on every later call."""
+    return mcp.sse_app()
+
+
 if __name__ == "__main__":
     import uvicorn
     
     # Run the server
     uvicorn.run(
-        mcp.sse_app(),
+        create_app,
+        factory=True,
         host="0.0.0.0",
         port=8080,
         log_level="info",